@@ -0,0 +1,56 @@
+from django.contrib import admin
+from .models import DailySales, DailyDimensionSales, RelatedProduct, TrendingScore
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ['date', 'orders', 'quantity', 'revenue', 'delivery']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyDimensionSales)
+class DailyDimensionSalesAdmin(admin.ModelAdmin):
+    list_display = ['date', 'dimension', 'label', 'orders', 'quantity', 'revenue']
+    list_filter = ['dimension']
+    search_fields = ['label']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TrendingScore)
+class TrendingScoreAdmin(admin.ModelAdmin):
+    list_display = ['model', 'object_id', 'score']
+    list_filter = ['model']
+    ordering = ['-score']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RelatedProduct)
+class RelatedProductAdmin(admin.ModelAdmin):
+    list_display = ['product', 'rank', 'related', 'kind', 'score']
+    list_filter = ['kind']
+    list_select_related = ['product', 'related']
+    search_fields = ['product__name']
+    ordering = ['product', 'kind', 'rank']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
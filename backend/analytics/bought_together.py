@@ -0,0 +1,120 @@
+"""
+"Покупают вместе": рекомендации по совместным покупкам.
+
+Матрица совместной встречаемости товаров в заказах хранится разреженно в
+CoPurchase: только пары a < b, а на диагонали (a = b) - число заказов с
+товаром. Полная сборка считает матрицу заново по всем заказам,
+инкрементальная добавляет только заказы, созданные после прошлого запуска.
+Близость товаров - косинус c(a, b) / sqrt(n(a) * n(b)), чтобы самые
+продаваемые товары не попадали во все списки подряд. Для каждого товара в
+RelatedProduct хранится BOUGHT_TOGETHER_SIZE лучших соседей, и API читает
+готовый список одним запросом по индексу.
+
+Отмененные заказы не учитываются; отмена уже учтенного заказа исправляется
+полной сборкой.
+"""
+import datetime
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import generations
+from orders.models import OrderItem
+from . import db, related
+from .models import CoPurchase, RelatedProduct, RollupState
+
+KIND = 'bought_together'
+STATE_NAME = 'bought_together'
+
+
+def count_pairs(rows):
+    """
+    Встречаемость товаров: rows - (id заказа, id товара), упорядоченные по
+    заказу. Возвращает Counter {(a, b): число заказов}, a <= b
+    """
+    counts = Counter()
+    for _, items in groupby(rows, key=itemgetter(0)):
+        products = sorted({product_id for _, product_id in items})
+        counts.update((product_id, product_id) for product_id in products)
+        if len(products) <= settings.BOUGHT_TOGETHER_MAX_ORDER_PRODUCTS:
+            counts.update(combinations(products, 2))
+    return counts
+
+
+def _order_products(since, until):
+    items = OrderItem.objects.filter(order__created_at__lt=until).exclude(order__status='cancelled')
+    if since is not None:
+        items = items.filter(order__created_at__gte=since)
+    return items.order_by('order_id').values_list('order_id', 'product_id').iterator(chunk_size=5000)
+
+
+def _partners(products):
+    """Товары, у которых есть достаточно совместных заказов с products"""
+    pairs = CoPurchase.objects.filter(
+        Q(product_a__in=products) | Q(product_b__in=products),
+        product_a__lt=F('product_b'), orders__gte=settings.BOUGHT_TOGETHER_MIN_ORDERS,
+    )
+    return {product_id for pair in pairs.values_list('product_a', 'product_b') for product_id in pair}
+
+
+def neighbours(products=None):
+    """Лучшие соседи {товар: [(оценка, сосед), ...]} товаров products (None - всех)"""
+    totals = dict(CoPurchase.objects.filter(product_a=F('product_b')).values_list('product_a', 'orders'))
+    pairs = CoPurchase.objects.filter(
+        product_a__lt=F('product_b'), orders__gte=settings.BOUGHT_TOGETHER_MIN_ORDERS
+    )
+    if products is not None:
+        pairs = pairs.filter(Q(product_a__in=products) | Q(product_b__in=products))
+
+    candidates = defaultdict(list)
+    for a, b, together in pairs.values_list('product_a', 'product_b', 'orders').iterator(chunk_size=5000):
+        score = together / math.sqrt(totals[a] * totals[b])
+        if products is None or a in products:
+            candidates[a].append((score, b))
+        if products is None or b in products:
+            candidates[b].append((score, a))
+    return {
+        product_id: heapq.nlargest(settings.BOUGHT_TOGETHER_SIZE, items)
+        for product_id, items in candidates.items()
+    }
+
+
+def build(incremental=False):
+    """
+    Собирает рекомендации (incremental - добавляет только новые заказы).
+    Возвращает (число учтенных пар и товаров, число обновленных списков).
+    """
+    # Заказы последних секунд могут быть еще не закоммичены - их учтет следующий запуск
+    until = timezone.now() - datetime.timedelta(seconds=settings.ANALYTICS_WATERMARK_OVERLAP)
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=STATE_NAME)
+        incremental = incremental and state.watermark is not None
+        counts = count_pairs(_order_products(state.watermark if incremental else None, until))
+        if incremental:
+            db.increment(
+                CoPurchase, ['product_a', 'product_b'], 'orders',
+                [pair + (together,) for pair, together in counts.items()],
+            )
+            products = {product_id for pair in counts for product_id in pair}
+            # Оценки соседей тоже изменились: у них общий знаменатель с новыми товарами
+            products |= _partners(products)
+        else:
+            CoPurchase.objects.all().delete()
+            CoPurchase.objects.bulk_create([
+                CoPurchase(product_a_id=a, product_b_id=b, orders=together)
+                for (a, b), together in counts.items()
+            ], batch_size=5000)
+            products = None
+        lists = neighbours(products)
+        related.replace(KIND, lists, products)
+        state.watermark = until
+        state.save(update_fields=['watermark'])
+    generations.touch(RelatedProduct)
+    return len(counts), len(lists)
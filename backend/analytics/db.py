@@ -0,0 +1,28 @@
+"""Запросы PostgreSQL, общие для задач аналитики"""
+from django.db import connection
+
+
+def increment(model, key_fields, field, rows, defaults=None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE SET field = field + EXCLUDED.field:
+    rows - [(значения key_fields..., прирост)], defaults - значения
+    остальных обязательных полей новой строки
+    """
+    defaults = defaults or {}
+    meta = model._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    columns = [quote(meta.get_field(name).column) for name in [*key_fields, field, *defaults]]
+    keys = ', '.join(columns[:len(key_fields)])
+    column = columns[len(key_fields)]
+    row_template = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    # Строки в одном порядке - одновременные вставки не блокируют друг друга взаимно
+    rows = sorted(rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            chunk = rows[start:start + 500]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns)}) VALUES {", ".join([row_template] * len(chunk))} '
+                f'ON CONFLICT ({keys}) DO UPDATE SET {column} = {table}.{column} + EXCLUDED.{column}',
+                [value for row in chunk for value in (*row, *defaults.values())]
+            )
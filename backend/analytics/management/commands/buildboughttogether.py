@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics import bought_together
+
+
+class Command(BaseCommand):
+    help = 'Собирает рекомендации "Покупают вместе" по совместным покупкам в заказах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true', help='Учесть только заказы, созданные после прошлого запуска'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        pairs, lists = bought_together.build(incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено пар: {pairs}, обновлено списков: {lists} за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Обновляет дневные сводки продаж за дни, затронутые с прошлого запуска'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать сводки за все дни')
+        parser.add_argument('--batch-days', type=int, default=31, help='Дней в одной транзакции')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        log = self.stdout.write if options['verbosity'] > 1 else None
+        days = rollups.run(full=options['full'], batch_days=options['batch_days'], log=log)
+        self.stdout.write(self.style.SUCCESS(
+            f'Сводки обновлены: {days} дн. за {time.monotonic() - started:.1f} с'
+        ))
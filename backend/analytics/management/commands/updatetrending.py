@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics import trending
+
+
+class Command(BaseCommand):
+    help = 'Переносит новые просмотры и заказы в оценки трендов товаров и галереи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать оценки по всем хранимым корзинам')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = trending.update(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки обновлены: {updated} объектов за {time.monotonic() - started:.1f} с'
+        ))
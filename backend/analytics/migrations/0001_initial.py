@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDimensionSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('dimension', models.CharField(choices=[('product', 'Товар'), ('category', 'Категория'), ('color', 'Цвет'), ('payment_method', 'Способ оплаты')], max_length=20, verbose_name='Разрез')),
+                ('key', models.CharField(max_length=50, verbose_name='Ключ')),
+                ('label', models.CharField(max_length=200, verbose_name='Название')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Штук')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день по разрезу',
+                'verbose_name_plural': 'Продажи по дням и разрезам',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Штук')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('delivery', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Доставка')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи по дням',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Состояние сводки',
+                'verbose_name_plural': 'Состояния сводок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailydimensionsales',
+            constraint=models.UniqueConstraint(fields=('dimension', 'date', 'key'), name='daily_dimension_unique'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Просмотров')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('applied_views', models.PositiveIntegerField(default=0)),
+                ('applied_orders', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'События за час',
+                'verbose_name_plural': 'События по часам',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('score', models.FloatField(default=0, verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Оценка тренда',
+                'verbose_name_plural': 'Оценки тренда',
+                'indexes': [models.Index(fields=['model', '-score'], name='trending_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='trending_score_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingbucket',
+            index=models.Index(fields=['hour'], name='trending_bucket_hour_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingbucket',
+            index=models.Index(condition=models.Q(('views__gt', models.F('applied_views')), ('orders__gt', models.F('applied_orders')), _connector='OR'), fields=['hour'], name='trending_bucket_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingbucket',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id', 'hour'), name='trending_bucket_unique'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_image_metadata'),
+        ('analytics', '0003_related_products'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFeatures',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='products.product', verbose_name='Товар')),
+                ('features', models.TextField(verbose_name='Признаки')),
+            ],
+            options={
+                'verbose_name': 'Признаки товара',
+                'verbose_name_plural': 'Признаки товаров',
+            },
+        ),
+        migrations.AlterField(
+            model_name='relatedproduct',
+            name='kind',
+            field=models.CharField(choices=[('bought_together', 'Покупают вместе'), ('similar', 'Похожие')], max_length=20, verbose_name='Вид'),
+        ),
+    ]
@@ -0,0 +1,175 @@
+from django.db import models
+from django.db.models import F, Q
+
+
+class DailySales(models.Model):
+    """Продажи за день (без отмененных заказов), поддерживается analytics.rollups"""
+    date = models.DateField(unique=True, verbose_name="Дата")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="Штук")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Выручка")
+    delivery = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Доставка")
+
+    class Meta:
+        verbose_name = "Продажи за день"
+        verbose_name_plural = "Продажи по дням"
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue}₽"
+
+
+class DailyDimensionSales(models.Model):
+    """Продажи за день в разрезе товара, категории, цвета или способа оплаты"""
+    DIMENSION_CHOICES = [
+        ('product', 'Товар'),
+        ('category', 'Категория'),
+        ('color', 'Цвет'),
+        ('payment_method', 'Способ оплаты'),
+    ]
+
+    date = models.DateField(verbose_name="Дата")
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES, verbose_name="Разрез")
+    key = models.CharField(max_length=50, verbose_name="Ключ")
+    label = models.CharField(max_length=200, verbose_name="Название")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="Штук")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Выручка")
+
+    class Meta:
+        verbose_name = "Продажи за день по разрезу"
+        verbose_name_plural = "Продажи по дням и разрезам"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'date', 'key'], name='daily_dimension_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.dimension}={self.label}: {self.revenue}₽"
+
+
+class RollupState(models.Model):
+    """Метка времени инкрементальной задачи аналитики (до нее изменения уже учтены)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Состояние сводки"
+        verbose_name_plural = "Состояния сводок"
+
+    def __str__(self):
+        return f"{self.name}: {self.watermark}"
+
+
+class TrendingBucket(models.Model):
+    """
+    События объекта (товара, изображения галереи) за час. applied_* - сколько
+    из них уже перенесено в TrendingScore.
+    """
+    model = models.CharField(max_length=100, verbose_name="Модель")
+    object_id = models.PositiveIntegerField(verbose_name="ID объекта")
+    hour = models.DateTimeField(verbose_name="Час")
+    views = models.PositiveIntegerField(default=0, verbose_name="Просмотров")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+    applied_views = models.PositiveIntegerField(default=0)
+    applied_orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "События за час"
+        verbose_name_plural = "События по часам"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'hour'], name='trending_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='trending_bucket_hour_idx'),
+            # Корзины с еще не перенесенными событиями
+            models.Index(
+                fields=['hour'], name='trending_bucket_pending_idx',
+                condition=Q(views__gt=F('applied_views')) | Q(orders__gt=F('applied_orders')),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} {self.hour:%Y-%m-%d %H}:00"
+
+
+class TrendingScore(models.Model):
+    """Затухающая оценка популярности объекта (см. analytics.trending)"""
+    model = models.CharField(max_length=100, verbose_name="Модель")
+    object_id = models.PositiveIntegerField(verbose_name="ID объекта")
+    score = models.FloatField(default=0, verbose_name="Оценка")
+
+    class Meta:
+        verbose_name = "Оценка тренда"
+        verbose_name_plural = "Оценки тренда"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], name='trending_score_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['model', '-score'], name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id}: {self.score:.2f}"
+
+
+class CoPurchase(models.Model):
+    """
+    Число заказов, в которых вместе были товары product_a и product_b
+    (product_a <= product_b; при равенстве - число заказов с товаром)
+    """
+    product_a = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    product_b = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+
+    class Meta:
+        verbose_name = "Совместная покупка"
+        verbose_name_plural = "Совместные покупки"
+        constraints = [
+            models.UniqueConstraint(fields=['product_a', 'product_b'], name='copurchase_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_a_id} + {self.product_b_id}: {self.orders}"
+
+
+class RelatedProduct(models.Model):
+    """Рекомендация: товар related для товара product, rank - место в списке"""
+    KIND_CHOICES = [
+        ('bought_together', 'Покупают вместе'),
+        ('similar', 'Похожие'),
+    ]
+
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='recommendations', verbose_name="Товар"
+    )
+    related = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='recommended_for', verbose_name="Рекомендуемый товар"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Вид")
+    rank = models.PositiveSmallIntegerField(verbose_name="Место")
+    score = models.FloatField(verbose_name="Оценка")
+
+    class Meta:
+        verbose_name = "Рекомендуемый товар"
+        verbose_name_plural = "Рекомендуемые товары"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'rank'], name='related_product_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.kind} #{self.rank})"
+
+
+class ProductFeatures(models.Model):
+    """Признаки товара, по которым посчитан его список похожих (см. products.similar)"""
+    product = models.OneToOneField(
+        'products.Product', on_delete=models.CASCADE, primary_key=True, related_name='+', verbose_name="Товар"
+    )
+    features = models.TextField(verbose_name="Признаки")
+
+    class Meta:
+        verbose_name = "Признаки товара"
+        verbose_name_plural = "Признаки товаров"
+
+    def __str__(self):
+        return f"{self.product_id}: {self.features}"
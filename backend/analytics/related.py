@@ -0,0 +1,18 @@
+"""Хранимые списки рекомендуемых товаров (RelatedProduct)"""
+from .models import RelatedProduct
+
+
+def replace(kind, lists, products=None):
+    """
+    Заменяет списки вида kind товаров products (None - все списки):
+    lists - {товар: [(оценка, рекомендуемый товар), ...]} по убыванию оценки
+    """
+    links = RelatedProduct.objects.filter(kind=kind)
+    if products is not None:
+        links = links.filter(product__in=products)
+    links.delete()
+    RelatedProduct.objects.bulk_create([
+        RelatedProduct(product_id=product_id, related_id=related_id, kind=kind, rank=rank, score=score)
+        for product_id, items in lists.items()
+        for rank, (score, related_id) in enumerate(items, 1)
+    ], batch_size=5000)
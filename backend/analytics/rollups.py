@@ -0,0 +1,132 @@
+"""
+Дневные сводки продаж.
+
+Сводки пересчитываются по дням целиком, но только за дни, затронутые с
+прошлого запуска: дни берутся из заказов, у которых updated_at не раньше
+сохраненной метки (минус ANALYTICS_WATERMARK_OVERLAP - запас на долгие
+транзакции). День продажи - дата создания заказа в часовом поясе проекта,
+отмененные заказы не учитываются. Удаление заказов меток не оставляет -
+после него нужен полный пересчет (rollupsales --full).
+"""
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from .models import DailyDimensionSales, DailySales, RollupState
+
+STATE_NAME = 'sales'
+
+# Разрез: (поле ключа, поле названия) позиции заказа
+DIMENSIONS = {
+    'product': ('product_id', 'product__name'),
+    'category': ('product__category_id', 'product__category__name'),
+    'color': ('selected_color_id', 'selected_color__name'),
+    'payment_method': ('order__payment_method', None),
+}
+PAYMENT_LABELS = dict(Order.PAYMENT_CHOICES)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _created_on(days, prefix=''):
+    """Условие "создан в один из дней days" диапазонами по created_at (по индексу)"""
+    return reduce(or_, (
+        Q(**{
+            f'{prefix}created_at__gte': _day_start(day),
+            f'{prefix}created_at__lt': _day_start(day + datetime.timedelta(days=1)),
+        })
+        for day in days
+    ))
+
+
+def touched_days(since):
+    """Дни продаж заказов, измененных начиная с since"""
+    return set(
+        Order.objects.filter(updated_at__gte=since)
+        .annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+    )
+
+
+def all_days():
+    return set(Order.objects.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct())
+
+
+def refresh_days(days):
+    """Пересчитывает сводки за дни days (одной транзакцией)"""
+    days = sorted(days)
+    if not days:
+        return
+    orders = Order.objects.filter(_created_on(days)).exclude(status='cancelled')
+    items = OrderItem.objects.filter(_created_on(days, 'order__')).exclude(order__status='cancelled')
+    items = items.annotate(day=TruncDate('order__created_at'))
+    revenue = Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+    totals = {
+        row['day']: row for row in orders.annotate(day=TruncDate('created_at')).values('day').annotate(
+            orders=Count('id'), revenue=Sum('total_amount'), delivery=Sum('delivery_cost'),
+        )
+    }
+    quantities = dict(items.values('day').annotate(total=Sum('quantity')).values_list('day', 'total'))
+    daily = [
+        DailySales(
+            date=day, orders=row['orders'], quantity=quantities.get(day) or 0,
+            revenue=row['revenue'] or 0, delivery=row['delivery'] or 0,
+        )
+        for day, row in totals.items()
+    ]
+
+    breakdown = []
+    for dimension, (key_field, label_field) in DIMENSIONS.items():
+        fields = [key_field] + ([label_field] if label_field else [])
+        rows = items.values('day', *fields).annotate(
+            order_count=Count('order', distinct=True), total_quantity=Sum('quantity'), total_revenue=revenue,
+        )
+        for row in rows:
+            key = row[key_field]
+            breakdown.append(DailyDimensionSales(
+                date=row['day'], dimension=dimension, key=str(key),
+                label=row[label_field] if label_field else PAYMENT_LABELS.get(key, key),
+                orders=row['order_count'], quantity=row['total_quantity'] or 0, revenue=row['total_revenue'] or 0,
+            ))
+
+    with transaction.atomic():
+        DailySales.objects.filter(date__in=days).delete()
+        DailyDimensionSales.objects.filter(date__in=days).delete()
+        DailySales.objects.bulk_create(daily)
+        DailyDimensionSales.objects.bulk_create(breakdown, batch_size=1000)
+
+
+def run(full=False, batch_days=31, log=None):
+    """
+    Обновляет сводки: все дни (full) или затронутые с прошлого запуска.
+    Возвращает число пересчитанных дней.
+    """
+    started = timezone.now()
+    state, _ = RollupState.objects.get_or_create(name=STATE_NAME)
+    if full or state.watermark is None:
+        days = all_days()
+        with transaction.atomic():
+            DailySales.objects.exclude(date__in=days).delete()
+            DailyDimensionSales.objects.exclude(date__in=days).delete()
+    else:
+        days = touched_days(state.watermark - datetime.timedelta(seconds=settings.ANALYTICS_WATERMARK_OVERLAP))
+
+    days = sorted(days)
+    for start in range(0, len(days), batch_days):
+        batch = days[start:start + batch_days]
+        refresh_days(batch)
+        if log:
+            log(f'{batch[0]} - {batch[-1]}: {len(batch)} дн.')
+
+    state.watermark = started
+    state.save(update_fields=['watermark'])
+    return len(days)
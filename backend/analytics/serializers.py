@@ -0,0 +1,45 @@
+import datetime
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import DailyDimensionSales
+
+
+class PeriodQuerySerializer(serializers.Serializer):
+    """Период отчета (по умолчанию - последние 30 дней)"""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        data.setdefault('date_to', timezone.localdate())
+        data.setdefault('date_from', data['date_to'] - datetime.timedelta(days=29))
+        if data['date_to'] < data['date_from']:
+            raise serializers.ValidationError({'date_to': ['Конец периода раньше начала']})
+        return data
+
+
+class SalesQuerySerializer(PeriodQuerySerializer):
+    interval = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+
+
+class TopQuerySerializer(PeriodQuerySerializer):
+    dimension = serializers.ChoiceField(choices=DailyDimensionSales.DIMENSION_CHOICES)
+    order_by = serializers.ChoiceField(choices=['revenue', 'quantity', 'orders'], default='revenue')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class SalesPointSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    orders = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    delivery = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class TopRowSerializer(serializers.Serializer):
+    key = serializers.CharField()
+    label = serializers.CharField()
+    orders = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
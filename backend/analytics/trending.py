@@ -0,0 +1,179 @@
+"""
+Тренды товаров и изображений галереи.
+
+События копятся в часовых корзинах TrendingBucket: просмотры - при сбросе
+буфера core.view_counters, заказы - командой updatetrending из позиций
+новых заказов. Та же команда переносит в TrendingScore только прирост
+корзин с прошлого запуска.
+
+Вес события затухает экспоненциально (период полураспада TRENDING_HALF_LIFE),
+но оценка хранится относительно точки отсчета epoch: событие часа t дает
+вес * exp(rate * (t - epoch)). Общий множитель затухания для всех объектов
+одинаков, поэтому порядок по score верен без пересчета всей таблицы, и при
+каждом запуске меняются только строки объектов с новыми событиями. Когда
+показатель экспоненты становится большим, epoch сдвигается одним UPDATE,
+а затухшие оценки удаляются.
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from core import generations
+from core.view_counters import views_flushed
+from orders.models import OrderItem
+from products.models import Product
+from . import db
+from .models import RollupState, TrendingBucket, TrendingScore
+
+EPOCH_STATE = 'trending.epoch'
+ORDERS_STATE = 'trending.orders'
+# Показатель экспоненты, после которого epoch сдвигается (e**20 ~ 5e8)
+MAX_EXPONENT = 20
+# Оценки меньше этой удаляются при сдвиге epoch
+MIN_SCORE = 0.01
+
+
+def _rate():
+    """Скорость затухания, 1/час"""
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def _hours(delta):
+    return delta.total_seconds() / 3600
+
+
+def current_hour():
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+def add_events(events, kind, hour=None):
+    """
+    Добавляет события в корзины часа hour (по умолчанию текущего):
+    events - [(метка модели, id объекта, число)], kind - 'views' или 'orders'
+    """
+    hour = hour or current_hour()
+    rows = [(label, object_id, hour, count) for label, object_id, count in events if count]
+    if not rows:
+        return
+    other = 'orders' if kind == 'views' else 'views'
+    db.increment(
+        TrendingBucket, ['model', 'object_id', 'hour'], kind, rows,
+        {other: 0, 'applied_views': 0, 'applied_orders': 0},
+    )
+
+
+def _lock_state(name):
+    state, _ = RollupState.objects.select_for_update().get_or_create(name=name)
+    return state
+
+
+def _record_orders(until):
+    """Переносит в корзины позиции заказов, созданных с прошлого запуска до until"""
+    state = _lock_state(ORDERS_STATE)
+    since = state.watermark or until - datetime.timedelta(hours=settings.TRENDING_BUCKET_RETENTION)
+    if since < until:
+        rows = (
+            OrderItem.objects.filter(order__created_at__gte=since, order__created_at__lt=until)
+            .exclude(order__status='cancelled')
+            .annotate(hour=TruncHour('order__created_at'))
+            .values('hour', 'product_id')
+            .annotate(orders=Count('order', distinct=True))
+        )
+        by_hour = defaultdict(list)
+        label = generations.model_name(Product)
+        for row in rows:
+            by_hour[row['hour']].append((label, row['product_id'], row['orders']))
+        for hour, events in by_hour.items():
+            add_events(events, 'orders', hour)
+    state.watermark = until
+    state.save(update_fields=['watermark'])
+
+
+def _rebase(epoch, now):
+    """Сдвигает точку отсчета на now и удаляет затухшие оценки"""
+    factor = math.exp(-_rate() * _hours(now - epoch.watermark))
+    TrendingScore.objects.update(score=F('score') * factor)
+    TrendingScore.objects.filter(score__lt=MIN_SCORE).delete()
+    epoch.watermark = now
+
+
+def _apply_buckets(epoch):
+    """Добавляет к оценкам прирост корзин, возвращает число обновленных объектов"""
+    rate = _rate()
+    # Корзины блокируются до конца транзакции (в том же порядке, что и в
+    # add_events), чтобы сброс просмотров не изменил их между чтением и отметкой
+    pending = (
+        TrendingBucket.objects.filter(Q(views__gt=F('applied_views')) | Q(orders__gt=F('applied_orders')))
+        .select_for_update().order_by('model', 'object_id', 'hour')
+        .values_list('pk', 'model', 'object_id', 'hour', 'views', 'applied_views', 'orders', 'applied_orders')
+    )
+    ids = []
+    increments = defaultdict(float)
+    for pk, model, object_id, hour, views, applied_views, orders, applied_orders in pending:
+        events = views - applied_views + settings.TRENDING_ORDER_WEIGHT * (orders - applied_orders)
+        increments[model, object_id] += events * math.exp(rate * _hours(hour - epoch))
+        ids.append(pk)
+    db.increment(TrendingScore, ['model', 'object_id'], 'score', [key + (value,) for key, value in increments.items()])
+    TrendingBucket.objects.filter(pk__in=ids).update(applied_views=F('views'), applied_orders=F('orders'))
+    return len(increments)
+
+
+def update(full=False):
+    """
+    Переносит новые события в оценки (full - пересчитывает оценки по всем
+    хранимым корзинам). Возвращает число обновленных объектов.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Блокировка epoch заодно не дает двум запускам выполняться одновременно
+        epoch = _lock_state(EPOCH_STATE)
+        if full or epoch.watermark is None:
+            TrendingScore.objects.all().delete()
+            TrendingBucket.objects.update(applied_views=0, applied_orders=0)
+            epoch.watermark = now
+        elif _rate() * _hours(now - epoch.watermark) > MAX_EXPONENT:
+            _rebase(epoch, now)
+        epoch.save(update_fields=['watermark'])
+
+        _record_orders(now - datetime.timedelta(seconds=settings.ANALYTICS_WATERMARK_OVERLAP))
+        updated = _apply_buckets(epoch.watermark)
+        TrendingBucket.objects.filter(
+            hour__lt=now - datetime.timedelta(hours=settings.TRENDING_BUCKET_RETENTION)
+        ).delete()
+    generations.touch(TrendingScore)
+    return updated
+
+
+def top(model, limit):
+    """id объектов модели в порядке убывания оценки"""
+    return list(
+        TrendingScore.objects.filter(model=generations.model_name(model))
+        .order_by('-score').values_list('object_id', flat=True)[:limit]
+    )
+
+
+def top_objects(queryset, limit=None):
+    """
+    Объекты queryset в порядке тренда. Объекты, не попавшие в queryset
+    (например, неактивные), пропускаются - для них берется запас.
+    """
+    limit = limit or settings.TRENDING_SIZE
+    ids = top(queryset.model, limit * 2)
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects][:limit]
+
+
+# Сигналы
+
+def _on_views_flushed(sender, hits, **kwargs):
+    add_events(hits, 'views')
+
+
+def connect():
+    views_flushed.connect(_on_views_flushed, dispatch_uid='trending_views')
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('sales/', views.sales, name='analytics-sales'),
+    path('top/', views.top, name='analytics-top'),
+]
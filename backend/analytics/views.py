@@ -0,0 +1,59 @@
+from django.db.models import Max, Sum
+from django.db.models.functions import Trunc
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .models import DailyDimensionSales, DailySales
+from .serializers import (
+    SalesQuerySerializer, TopQuerySerializer, SalesPointSerializer, TopRowSerializer
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def sales(request):
+    """
+    Продажи по дням, неделям или месяцам (из дневных сводок)
+    """
+    serializer = SalesQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    points = (
+        DailySales.objects.filter(date__range=(params['date_from'], params['date_to']))
+        .annotate(period=Trunc('date', params['interval']))
+        .values('period')
+        .annotate(orders=Sum('orders'), quantity=Sum('quantity'), revenue=Sum('revenue'), delivery=Sum('delivery'))
+        .order_by('period')
+    )
+    return Response({
+        'date_from': params['date_from'],
+        'date_to': params['date_to'],
+        'interval': params['interval'],
+        'results': SalesPointSerializer(points, many=True).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def top(request):
+    """
+    Лучшие товары, категории, цвета или способы оплаты за период
+    """
+    serializer = TopQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    rows = (
+        DailyDimensionSales.objects.filter(
+            dimension=params['dimension'], date__range=(params['date_from'], params['date_to'])
+        )
+        .values('key')
+        .annotate(label=Max('label'), orders=Sum('orders'), quantity=Sum('quantity'), revenue=Sum('revenue'))
+        .order_by(f"-{params['order_by']}", 'key')[:params['limit']]
+    )
+    return Response({
+        'dimension': params['dimension'],
+        'date_from': params['date_from'],
+        'date_to': params['date_to'],
+        'results': TopRowSerializer(rows, many=True).data,
+    })
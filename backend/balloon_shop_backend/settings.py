@@ -38,11 +38,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
+    'core',
     'products',
     'orders',
     'gallery',
+    'analytics',
 ]
 
 MIDDLEWARE = [
@@ -137,6 +140,16 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Кеш, общий для воркеров на одном хосте. При нескольких хостах нужен
+# общий бэкенд (Redis, Memcached): через кеш процессы узнают об изменениях данных
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'var', 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -146,6 +159,90 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Буферизованные счетчики просмотров (см. core/view_counters.py)
+VIEW_COUNTER_STORE = os.path.join(BASE_DIR, 'var', 'view_counters.sqlite3')
+VIEW_COUNTER_FLUSH_INTERVAL = 30  # секунд
+
+# Полнотекстовый поиск (см. core/search.py). Польский текст индексируется
+# конфигурацией 'simple'; если в PostgreSQL установлен словарь ispell и создана
+# конфигурация 'polish', ее стоит поставить сюда вместо 'simple'
+SEARCH_CONFIGS = ('russian', 'simple')
+
+# Индекс автодополнения полностью перестраивается не реже, чем раз в столько секунд
+AUTOCOMPLETE_REFRESH_INTERVAL = 600
+
+# Колоночный движок каталога в памяти для списка товаров и счетчиков фильтров
+CATALOG_ENGINE_ENABLED = False
+CATALOG_ENGINE_REFRESH_INTERVAL = 300  # секунд
+
+# Кеш ответов справочных endpoint-ов (см. core/response_cache.py): ответ
+# считается свежим TIMEOUT секунд и сбрасывается сразу при изменении моделей,
+# из которых построен; еще STALE_TIMEOUT секунд его отдают, пока один запрос
+# считает новый. Для отдельного хранилища добавьте алиас в CACHES
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_STALE_TIMEOUT = 60
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+
+# Расчет корзины (POST /api/orders/quote/) кешируется на столько секунд;
+# при изменении товаров, цветов или зон доставки он пересчитывается сразу
+QUOTE_CACHE_TIMEOUT = 600
+
+# Доска заказов (GET /api/orders/board/): метка updated_since для следующего
+# опроса сдвигается назад на столько секунд, чтобы не пропустить заказы из
+# долгих транзакций (повторно пришедшие заказы клиент сливает по id)
+ORDER_BOARD_POLL_OVERLAP = 5
+
+# Сводки продаж (см. analytics/rollups.py): заказы, измененные за столько
+# секунд до метки прошлого запуска rollupsales, учитываются повторно
+ANALYTICS_WATERMARK_OVERLAP = 60
+
+# Тренды (см. analytics/trending.py): вес события уменьшается вдвое за
+# TRENDING_HALF_LIFE часов, заказ весит как TRENDING_ORDER_WEIGHT просмотров,
+# часовые корзины событий хранятся TRENDING_BUCKET_RETENTION часов
+TRENDING_HALF_LIFE = 24
+TRENDING_ORDER_WEIGHT = 10
+TRENDING_BUCKET_RETENTION = 7 * 24
+TRENDING_SIZE = 10
+
+# "Покупают вместе" (см. analytics/bought_together.py): длина списка,
+# наименьшее число совместных заказов и наибольшее число разных товаров
+# в заказе, пары которого учитываются (оптовые заказы дают шум)
+BOUGHT_TOGETHER_SIZE = 10
+BOUGHT_TOGETHER_MIN_ORDERS = 2
+BOUGHT_TOGETHER_MAX_ORDER_PRODUCTS = 30
+
+# Похожие товары (см. products/similar.py): длина списка и веса признаков
+# во взвешенном коэффициенте Жаккара (целые числа)
+SIMILAR_SIZE = 10
+SIMILAR_WEIGHTS = {
+    'category': 3,
+    'theme': 3,
+    'shape': 2,
+    'colors': 1,
+    'sources': 1,
+}
+
+# Поиск товаров по цвету (GET /api/products/by-color/): допуск ΔE (CIE76)
+# по умолчанию; ~2.3 - едва заметная разница, 10-20 - тот же оттенок
+COLOR_SEARCH_TOLERANCE = 15
+
+# Cache-Control публичных endpoint-ов каталога (см. core/conditional.py):
+# браузер всегда сверяет ETag, CDN может хранить ответ s-maxage секунд
+CATALOG_CACHE_CONTROL = 'public, max-age=0, s-maxage=60, must-revalidate'
+
+# Варианты загруженных изображений (см. core/images.py): ширины в пикселях,
+# качество WebP/JPEG и число процессов, которые их строят
+IMAGE_VARIANT_WIDTHS = (160, 480, 960, 1600)
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_WORKERS = 2
+
+# Списки админки на больших таблицах (см. core/admin.py): точный COUNT(*)
+# только для таблиц меньше этого числа строк (по оценке планировщика) и
+# предупреждение в лог, если страница списка делает больше запросов
+ADMIN_EXACT_COUNT_LIMIT = 10000
+ADMIN_QUERY_BUDGET = 20
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
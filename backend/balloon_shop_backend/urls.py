@@ -24,6 +24,10 @@ urlpatterns = [
     path('api/products/', include('products.urls')),
     path('api/orders/', include('orders.urls')),
     path('api/gallery/', include('gallery.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    # Асинхронные версии endpoint-ов чтения (для запуска под ASGI, см. docs/DEPLOYMENT.md)
+    path('api/async/products/', include('products.async_urls')),
+    path('api/async/gallery/', include('gallery.async_urls')),
 ]
 
 # ДОБАВЛЕНО: Поддержка медиафайлов для изображений
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'balloon_shop_backend.settings')
 
 application = get_wsgi_application()
+
+# Индексы в памяти строятся при старте воркера, а не на первом запросе
+from products import autocomplete  # noqa: E402
+
+autocomplete.warm()
@@ -0,0 +1,59 @@
+"""
+Режим производительности для списков админки на больших таблицах.
+
+LargeTableAdminMixin не делает полный COUNT(*) для заголовка списка, а число
+строк для пагинации берет из плана запроса PostgreSQL (точный COUNT(*) -
+только если оценка меньше ADMIN_EXACT_COUNT_LIMIT). Число запросов страницы
+списка (вместе с отрисовкой шаблона) считается, и при превышении бюджета
+ADMIN_QUERY_BUDGET в лог пишется предупреждение - так запросы на каждую
+строку видны сразу, а не после того, как страница начнет падать по таймауту.
+"""
+import logging
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from core.pagination import estimate_count
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return self.object_list.count()
+        return estimate
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class LargeTableAdminMixin:
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    # None - из настройки ADMIN_QUERY_BUDGET
+    query_budget = None
+
+    def changelist_view(self, request, extra_context=None):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, 'render'):
+                response.render()
+        budget = self.query_budget or settings.ADMIN_QUERY_BUDGET
+        if counter.count > budget:
+            logger.warning(
+                'Список %s в админке: %d запросов при бюджете %d',
+                self.model._meta.label, counter.count, budget
+            )
+        return response
@@ -0,0 +1,129 @@
+"""
+Асинхронные (ASGI) версии endpoint-ов чтения.
+
+DRF-представления синхронные: под gunicorn с sync-воркерами запрос, который
+ждет базу, занимает воркер целиком. Здесь тот же ответ строится в корутине.
+Запрос, фильтры, сортировка, пагинатор и сериализатор берутся у синхронного
+DRF-представления (view_class), поэтому ответ совпадает с его JSON-ответом,
+а к БД представление обращается через асинхронный интерфейс ORM (acount,
+afirst, async for). То, у чего в Django 4.2 асинхронного варианта нет
+(проверка значений фильтров, кеш поколений, буфер просмотров), выполняется
+через sync_to_async в потоке запроса, не блокируя цикл событий.
+
+Связи загружаются заранее (select_related / prefetch_related): ленивое
+обращение к связи из корутины Django запрещает. Курсорная пагинация
+(?cursor=) считается синхронной реализацией в потоке.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import exception_handler
+
+from core import conditional
+
+
+def render(data, status=200, headers=None):
+    """JSON-ответ (рендерер DRF не обращается к БД и не блокирует)"""
+    renderer = JSONRenderer()
+    return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type, headers=headers)
+
+
+class AsyncReadView(View):
+    """
+    Основа асинхронной версии GET-представления view_class: ответ строит
+    корутина respond(view) подкласса (AsyncListView, AsyncDetailView).
+    select_related и prefetch_related - связи, которые читает сериализатор.
+    """
+    view_class = None
+    select_related = ()
+    prefetch_related = ()
+    http_method_names = ['get', 'head', 'options']
+
+    def get_sync_view(self, request, *args, **kwargs):
+        """Экземпляр view_class, подготовленный к запросу (как в APIView.dispatch)"""
+        view = self.view_class(args=args, kwargs=kwargs, format_kwarg=None, headers={})
+        view.request = view.initialize_request(request, *args, **kwargs)
+        return view
+
+    def related(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_sync_view(request, *args, **kwargs)
+        try:
+            view.check_permissions(view.request)
+            return await conditional.aserve(
+                request, view.version_models,
+                lambda: self.respond(view), lambda: self.not_modified(view),
+            )
+        except (Http404, exceptions.APIException) as exc:
+            response = exception_handler(exc, {'view': view, 'args': args, 'kwargs': kwargs, 'request': view.request})
+            headers = {name: value for name, value in response.items() if name != 'Content-Type'}
+            return render(response.data, response.status_code, headers)
+
+    async def not_modified(self, view):
+        """Вызывается вместо respond(), когда клиент получает 304"""
+
+
+class AsyncListView(AsyncReadView):
+    """Список: фильтры и пагинация view_class, страница читается асинхронно"""
+
+    def get_source(self, view):
+        """Отфильтрованный список (проверка фильтров может читать БД - вызывается в потоке)"""
+        return view.filter_queryset(view.get_queryset())
+
+    async def count(self, source):
+        return await source.acount() if isinstance(source, QuerySet) else source.count()
+
+    async def fetch(self, view, source, start, stop):
+        """Объекты строк start..stop списка"""
+        return [item async for item in self.related(source)[start:stop]]
+
+    async def respond(self, view):
+        paginator = view.paginator
+        cursor_param = getattr(paginator, 'cursor_query_param', None)
+        if cursor_param and cursor_param in view.request.query_params:
+            response = await sync_to_async(view.list)(view.request)
+            return render(response.data, response.status_code)
+
+        source = await sync_to_async(self.get_source)(view)
+        # Пагинатор DRF размечает номера строк, а строки страницы читаются отдельно
+        rows = None
+        if paginator is not None:
+            rows = paginator.paginate_queryset(range(await self.count(source)), view.request, view)
+        if rows is None:
+            objects = await self.fetch(view, source, 0, None)
+            return render(view.get_serializer(objects, many=True).data)
+        objects = await self.fetch(view, source, rows[0], rows[-1] + 1) if rows else []
+        data = view.get_serializer(objects, many=True).data
+        return render(paginator.get_paginated_response(data).data)
+
+
+class AsyncDetailView(AsyncReadView):
+    """Один объект по lookup_field view_class"""
+
+    async def get_object(self, view):
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        instance = await self.related(queryset).filter(
+            **{view.lookup_field: view.kwargs[lookup_url_kwarg]}
+        ).afirst()
+        if instance is None:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        view.check_object_permissions(view.request, instance)
+        return instance
+
+    async def retrieved(self, view, instance):
+        """Вызывается перед сериализацией найденного объекта"""
+
+    async def respond(self, view):
+        instance = await self.get_object(view)
+        await self.retrieved(view, instance)
+        return render(view.get_serializer(instance).data)
@@ -0,0 +1,106 @@
+"""
+Условные GET-запросы для публичных endpoint-ов каталога.
+
+ETag ответа - хеш URL, заголовка Accept и поколений моделей, из которых
+он построен (см. core.generations), Last-Modified - время самого нового
+из этих поколений. Поэтому совпадение If-None-Match проверяется до
+запросов к БД и сериализации, и клиент получает 304. Заголовок
+Surrogate-Key перечисляет те же теги: по ним CDN может сбрасывать кеш.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core import generations
+
+# Общее поколение всех моделей каталога (товары, галерея и справочники)
+CATALOG = 'catalog'
+
+
+def get_validators(request, tags):
+    """(ETag, Last-Modified в секундах) для запроса и тегов"""
+    versions = generations.current_many(generations.names(tags))
+    digest = hashlib.sha1()
+    for part in (request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', '')):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    for name in sorted(versions):
+        digest.update(f'{name}={versions[name]};'.encode())
+    last_modified = max(versions.values()) // 1_000_000 if versions else None
+    return quote_etag(digest.hexdigest()), last_modified
+
+
+def set_headers(response, tags, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = settings.CATALOG_CACHE_CONTROL
+    response['Surrogate-Key'] = ' '.join([CATALOG, *generations.names(tags)])
+    response['X-Catalog-Version'] = str(generations.current(CATALOG))
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def serve(request, tags, compute, not_modified=None):
+    """
+    Отвечает 304, если у клиента актуальная версия, иначе вызывает compute().
+    not_modified() вызывается перед ответом 304 (например, чтобы учесть просмотр).
+    """
+    etag, last_modified = get_validators(request, tags)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        if not_modified is not None and response.status_code == 304:
+            not_modified()
+    else:
+        response = compute()
+        if response.status_code != 200:
+            return response
+    return set_headers(response, tags, etag, last_modified)
+
+
+async def aserve(request, tags, compute, not_modified=None):
+    """serve() для асинхронных представлений: compute и not_modified - корутины"""
+    # Поколения читаются из кеша Django, у которого нет асинхронного API
+    etag, last_modified = await sync_to_async(get_validators)(request, tags)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        if not_modified is not None and response.status_code == 304:
+            await not_modified()
+    else:
+        response = await compute()
+        if response.status_code != 200:
+            return response
+    return await sync_to_async(set_headers)(response, tags, etag, last_modified)
+
+
+def conditional(*tags):
+    """Декоратор для функций-представлений (ставится под @api_view)"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return serve(request, tags, lambda: view(request, *args, **kwargs))
+        return wrapped
+    return decorator
+
+
+class ConditionalMixin:
+    """
+    ETag/Last-Modified и 304 для GET-представления; version_models - модели
+    (или имена поколений), от которых зависит ответ. Метод not_modified()
+    вызывается вместо обработки запроса, когда клиент получает 304.
+    """
+    version_models = ()
+
+    def get(self, request, *args, **kwargs):
+        return serve(
+            request, self.version_models,
+            lambda: super(ConditionalMixin, self).get(request, *args, **kwargs),
+            lambda: self.not_modified(request, *args, **kwargs),
+        )
+
+    def not_modified(self, request, *args, **kwargs):
+        pass
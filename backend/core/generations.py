@@ -0,0 +1,117 @@
+"""
+Поколения данных для межпроцессной инвалидации.
+
+Поколение - число в общем кеше, которое растет после каждого изменения
+модели. Процессы, держащие производные данные в памяти, запоминают
+поколение, из которого они построены, и перестраивают данные при
+расхождении. Значения - метки времени в микросекундах, поэтому даже
+после вытеснения ключа из кеша новое поколение не совпадет с прежними.
+"""
+import time
+from collections import defaultdict, namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+def _key(name):
+    return f'generation:{name}'
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def current(name):
+    """Текущее поколение"""
+    return current_many([name])[name]
+
+
+def current_many(names):
+    """Текущие поколения {имя: значение}"""
+    keys = {_key(name): name for name in names}
+    values = cache.get_many(keys)
+    missing = {key: _now() for key in keys if key not in values}
+    for key, value in missing.items():
+        cache.add(key, value, timeout=None)
+    if missing:
+        values.update(cache.get_many(missing))
+    return {keys[key]: values.get(key, missing.get(key)) for key in keys}
+
+
+def bump(*names):
+    """Продвигает поколения и возвращает {имя: (прежнее, новое)}"""
+    keys = {_key(name): name for name in names}
+    values = cache.get_many(keys)
+    now = _now()
+    updated = {key: max(now, values.get(key, 0) + 1) for key in keys}
+    cache.set_many(updated, timeout=None)
+    return {keys[key]: (values.get(key), value) for key, value in updated.items()}
+
+
+def model_name(model):
+    return model._meta.label_lower
+
+
+def names(tags):
+    """Имена поколений для списка моделей и/или строковых имен"""
+    return [tag if isinstance(tag, str) else model_name(tag) for tag in tags]
+
+
+# Изменение модели: instance - сохраненный или удаленный объект (для M2M -
+# объект, у которого менялись связи), previous/generation - поколения до и после
+Change = namedtuple('Change', ['instance', 'deleted', 'previous', 'generation'])
+
+_listeners = defaultdict(list)
+# Общие поколения групп моделей (например, всего каталога)
+_groups = defaultdict(set)
+
+
+def track(model, groups=()):
+    """
+    Продвигает поколение модели (и поколения ее групп groups) после каждого
+    сохранения, удаления и изменения ее M2M-связей (после коммита транзакции).
+    """
+    name = model_name(model)
+    _groups[name].update(groups)
+
+    def changed(sender, instance, deleted=False, **kwargs):
+        if kwargs.get('action', 'post_').startswith('pre_'):
+            return
+
+        def commit():
+            previous, generation = bump(name, *_groups[name])[name]
+            change = Change(instance, deleted, previous, generation)
+            for callback in _listeners[name]:
+                callback(change)
+
+        transaction.on_commit(commit)
+
+    def deleted(sender, instance, **kwargs):
+        changed(sender, instance, deleted=True)
+
+    uid = f'generation_{name}'
+    post_save.connect(changed, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
+    for field in model._meta.many_to_many:
+        m2m_changed.connect(changed, sender=field.remote_field.through, weak=False, dispatch_uid=uid)
+
+
+def touch(model):
+    """
+    Продвигает поколения модели и ее групп вручную - после изменений,
+    которые не вызывают сигналов (QuerySet.update(), bulk_create() и т.п.)
+    """
+    name = model_name(model)
+    return bump(name, *_groups[name])
+
+
+def on_change(model, callback):
+    """
+    Подписывает callback(change) на изменения модели в этом процессе,
+    чтобы процесс-автор изменения мог обновить свои данные без перестроения
+    """
+    track(model)
+    if callback not in _listeners[model_name(model)]:
+        _listeners[model_name(model)].append(callback)
@@ -0,0 +1,221 @@
+"""
+Производные изображения (варианты фиксированной ширины в WebP и JPEG)
+и метаданные изображений.
+
+После загрузки изображения его варианты строятся вне запроса, в пуле
+процессов: рабочий процесс читает оригинал из хранилища и пишет варианты
+по детерминированным путям, а основной процесс записывает результат в поля
+модели <поле>_variants, <поле>_width, <поле>_height, <поле>_size,
+<поле>_color и <поле>_placeholder. Так размеры, преобладающий цвет и
+размытая миниатюра-заглушка отдаются в API без чтения файла. Повторная
+обработка пропускает уже готовые файлы, поэтому прерванную обработку можно
+продолжить командой processimages.
+"""
+import base64
+import io
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+from core import generations
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+# Поля результата обработки: <поле изображения>_<суффикс>
+RESULT_FIELDS = ('variants', 'width', 'height', 'size', 'color', 'placeholder')
+
+PLACEHOLDER_WIDTH = 16
+
+# Версия раскладки путей вариантов: варианты с другой версией считаются
+# непостроенными и перестраиваются командой processimages
+VARIANT_LAYOUT = 2
+
+ImageSpec = namedtuple('ImageSpec', ['field', 'variants_field', 'width_field'])
+
+_registry = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def register(model, field='image'):
+    """Подключает поле изображения модели к построению вариантов"""
+    _registry[model] = ImageSpec(field, f'{field}_variants', f'{field}_width')
+    post_save.connect(_schedule_on_save, sender=model, dispatch_uid=f'image_variants_{model._meta.label_lower}')
+
+
+def variant_name(name, width, image_format):
+    """
+    Путь варианта: variants/<путь оригинала>/<ширина>w.<формат>. Расширение
+    оригинала остается в пути, иначе у foo.jpg и foo.png были бы общие варианты
+    """
+    return f'variants/{name}/{width}w.{image_format}'
+
+
+def is_current(instance, field='image'):
+    """Обработан ли текущий файл изображения (варианты и метаданные)"""
+    file = getattr(instance, field)
+    return (
+        bool(file) and getattr(instance, f'{field}_variants').get('source') == file.name
+        and getattr(instance, f'{field}_variants').get('layout') == VARIANT_LAYOUT
+        and getattr(instance, f'{field}_width') is not None
+    )
+
+
+def variant_urls(instance, field='image'):
+    """{формат: [(ширина, url), ...]} или {}, если варианты еще не построены"""
+    if not is_current(instance, field):
+        return {}
+    file = getattr(instance, field)
+    widths = getattr(instance, f'{field}_variants')['widths']
+    return {
+        image_format: [
+            (width, file.storage.url(variant_name(file.name, width, image_format))) for width in widths
+        ]
+        for image_format in FORMATS
+    }
+
+
+def preview_url(instance, width, field='image'):
+    """URL наименьшего JPEG-варианта не уже width (или оригинала, если вариантов нет)"""
+    variants = dict(variant_urls(instance, field).get('jpeg', []))
+    suitable = [candidate for candidate in variants if candidate >= width]
+    if suitable:
+        return variants[min(suitable)]
+    if variants:
+        return variants[max(variants)]
+    return getattr(instance, field).url
+
+
+# Построение (выполняется в рабочем процессе)
+
+def _normalize(image):
+    """RGB или RGBA (палитры, CMYK, оттенки серого и т.п. приводятся к ним)"""
+    if image.mode in ('RGB', 'RGBA'):
+        return image
+    return image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+
+def _prepare(image, image_format):
+    """JPEG не поддерживает прозрачность: подкладываем белый фон"""
+    if image_format == 'jpeg' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image
+
+
+def dominant_color(image):
+    """Преобладающий цвет в виде #rrggbb (по уменьшенной копии, прозрачность - на белом)"""
+    small = _prepare(image.resize((64, 64), Image.BILINEAR), 'jpeg')
+    quantized = small.quantize(colors=8, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def placeholder(image):
+    """Крошечный JPEG в data URI - размытая заглушка (LQIP), пока грузится изображение"""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    small = _prepare(image.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR), 'jpeg')
+    buffer = io.BytesIO()
+    small.save(buffer, 'JPEG', quality=40, optimize=True)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def process(name, force=False):
+    """
+    Обрабатывает файл name из хранилища: строит варианты (ширины больше
+    оригинала не строятся) и считает метаданные. Возвращает {суффикс: значение}
+    для полей из RESULT_FIELDS.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image = _normalize(ImageOps.exif_transpose(image))
+
+    widths = [width for width in settings.IMAGE_VARIANT_WIDTHS if width < image.width] or [image.width]
+    for width in widths:
+        resized = None
+        for image_format, pil_format in FORMATS.items():
+            path = variant_name(name, width, image_format)
+            if not force and default_storage.exists(path):
+                continue
+            if resized is None:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+            buffer = io.BytesIO()
+            _prepare(resized, image_format).save(
+                buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True
+            )
+            default_storage.delete(path)
+            default_storage.save(path, ContentFile(buffer.getvalue()))
+    return {
+        'variants': {'source': name, 'layout': VARIANT_LAYOUT, 'widths': widths},
+        'width': image.width,
+        'height': image.height,
+        'size': default_storage.size(name),
+        'color': dominant_color(image),
+        'placeholder': placeholder(image),
+    }
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+# Постановка в очередь и сохранение результата (основной процесс)
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS, initializer=_init_worker
+            )
+        return _executor
+
+
+def save_result(model, pk, result):
+    """Записывает результат обработки, если изображение объекта с тех пор не менялось"""
+    spec = _registry[model]
+    updated = model.objects.filter(pk=pk, **{spec.field: result['variants']['source']}).update(
+        **{f'{spec.field}_{suffix}': result[suffix] for suffix in RESULT_FIELDS}
+    )
+    if updated:
+        generations.touch(model)
+    return updated
+
+
+def _on_done(model, pk, future):
+    try:
+        save_result(model, pk, future.result())
+    except Exception:
+        logger.exception('Не удалось построить варианты изображения %s #%s', model._meta.label, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule(instance):
+    """Ставит построение вариантов изображения объекта в пул процессов"""
+    model = type(instance)
+    name = getattr(instance, _registry[model].field).name
+    future = get_executor().submit(process, name)
+    future.add_done_callback(lambda done: _on_done(model, instance.pk, done))
+
+
+def _schedule_on_save(sender, instance, update_fields=None, **kwargs):
+    spec = _registry[sender]
+    if update_fields is not None and spec.field not in update_fields:
+        return
+    if getattr(instance, spec.field) and not is_current(instance, spec.field):
+        transaction.on_commit(lambda: schedule(instance))
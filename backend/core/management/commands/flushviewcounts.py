@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.view_counters import flush
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает накопленные просмотры товаров и изображений в базу данных'
+
+    def handle(self, *args, **options):
+        updated = flush()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено объектов: {updated}'))
@@ -0,0 +1,44 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from core import images
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие варианты и метаданные изображений (можно прерывать и запускать повторно)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Перестроить все варианты заново')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        executor = images.get_executor()
+        for model, spec in images._registry.items():
+            queryset = model.objects.exclude(**{spec.field: ''}).exclude(**{f'{spec.field}__isnull': True})
+            queryset = queryset.only('pk', spec.field, spec.variants_field, spec.width_field).order_by('pk')
+            done = failed = 0
+            batch = []
+            for instance in queryset.iterator(chunk_size=options['batch_size']):
+                if options['force'] or not images.is_current(instance, spec.field):
+                    batch.append(instance)
+                if len(batch) >= options['batch_size']:
+                    done, failed = self.process(executor, model, spec, batch, options['force'], done, failed)
+                    batch = []
+            done, failed = self.process(executor, model, spec, batch, options['force'], done, failed)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: обработано {done}, ошибок {failed}')
+        self.stdout.write(self.style.SUCCESS('Изображения обработаны'))
+
+    def process(self, executor, model, spec, batch, force, done, failed):
+        futures = {
+            executor.submit(images.process, getattr(instance, spec.field).name, force): instance.pk
+            for instance in batch
+        }
+        for future in as_completed(futures):
+            try:
+                images.save_result(model, futures[future], future.result())
+                done += 1
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{model._meta.label} #{futures[future]}: {error}')
+        return done, failed
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает поисковые векторы всех моделей, подключенных к поиску'
+
+    def handle(self, *args, **options):
+        for model in search._registry:
+            updated = search.update_search_vectors(model.objects.all())
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {updated}')
+        self.stdout.write(self.style.SUCCESS('Поисковые векторы обновлены'))
@@ -0,0 +1,13 @@
+"""
+Общее для команд импорта и экспорта (importcatalog, exportcatalog, exportorders)
+"""
+from django.core.management.base import CommandError
+
+
+def detect_format(path):
+    """Формат файла по расширению"""
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise CommandError('Укажите --format: формат не определяется по имени файла')
@@ -0,0 +1,164 @@
+"""
+Keyset-пагинация (по курсору) для длинных списков.
+
+По умолчанию работает обычная постраничная пагинация. Если в запросе есть
+параметр ?cursor= (пустой - первая страница), список читается по курсору:
+следующая страница начинается строго после последней строки предыдущей
+в порядке сортировки списка, без OFFSET и без COUNT(*). Порядок берется
+из queryset после всех фильтров и дополняется pk для устойчивости.
+"""
+import base64
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    # ?with_count=estimate - оценка по плану запроса, ?with_count=exact - точный COUNT(*)
+    count_query_param = 'with_count'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = False
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        ordering = self.get_keyset_ordering(queryset)
+        if ordering is None:
+            # Сортировку нельзя выразить ключом (NULL, связи, выражения и аннотации)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        self.ordering = ordering
+        self.page_size = self.get_page_size(request)
+        self.total = self.get_total(queryset, request)
+
+        cursor = request.query_params[self.cursor_query_param]
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self.after(queryset, self.decode_cursor(cursor)))
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page_rows = rows[:self.page_size]
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = {'next': self.get_next_link()}
+        if self.total is not None:
+            payload['count'] = self.total
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        cursor = self.encode_cursor(self.page_rows[-1])
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    # Порядок и курсор
+
+    def get_keyset_ordering(self, queryset):
+        """Поля сортировки с pk в конце или None, если ключом их не выразить"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        meta = queryset.model._meta
+        names = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                return None
+            name = item.lstrip('-')
+            if name in ('pk', meta.pk.name):
+                names.append(item)
+                return names
+            try:
+                field = meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation or field.null:
+                return None
+            names.append(item)
+        descending = bool(names) and names[-1].startswith('-')
+        return names + ['-pk' if descending else 'pk']
+
+    def cursor_values(self, row):
+        return [getattr(row, name.lstrip('-')) for name in self.ordering]
+
+    def encode_cursor(self, row):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else
+            str(value) if not isinstance(value, (int, float, bool, str)) else value
+            for value in self.cursor_values(row)
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def after(self, queryset, values):
+        """
+        Условие "строго после курсора" для сортировки (f1, ..., fn):
+        f1 > v1 OR (f1 = v1 AND f2 > v2) OR ... (с учетом направлений).
+        Дополнительное f1 >= v1 дает планировщику диапазон по первому полю индекса.
+        """
+        meta = queryset.model._meta
+        parsed = []
+        for item, value in zip(self.ordering, values):
+            name = item.lstrip('-')
+            field = meta.pk if name == 'pk' else meta.get_field(name)
+            # Курсор приходит от клиента: тип, диапазон и NULL проверяются до запроса
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                value = field.clean(value, None)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            parsed.append((name, '__lt' if item.startswith('-') else '__gt', value))
+
+        branches = []
+        for position, (name, lookup, value) in enumerate(parsed):
+            equal = [Q(**{prefix: prefix_value}) for prefix, _, prefix_value in parsed[:position]]
+            branches.append(reduce(and_, equal + [Q(**{name + lookup: value})]))
+        first_name, first_lookup, first_value = parsed[0]
+        return Q(**{first_name + first_lookup + 'e': first_value}) & reduce(or_, branches)
+
+    # Количество
+
+    def get_total(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса PostgreSQL (без выполнения запроса)"""
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
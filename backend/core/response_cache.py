@@ -0,0 +1,100 @@
+"""
+Кеш ответов для редко меняющихся справочных endpoint-ов.
+
+Запись кеша помнит поколения моделей-тегов, из которых построен ответ
+(см. core.generations), поэтому изменение любой из этих моделей сразу
+делает запись устаревшей, а изменения других моделей ее не трогают.
+Устаревшую запись еще некоторое время можно отдавать (stale-while-revalidate):
+пересчитывает ответ только один запрос, захвативший блокировку в кеше,
+остальные в это время получают прежний ответ и не создают лавину запросов к БД.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from core import generations
+
+POLL_INTERVAL = 0.05
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _cache_key(request):
+    # Полный URL с хостом: сериализаторы строят по нему абсолютные ссылки на изображения
+    url = request.build_absolute_uri()
+    return 'response:' + hashlib.sha1(url.encode()).hexdigest()
+
+
+def serve(request, models, compute, timeout=None):
+    """
+    Отдает ответ из кеша или считает его через compute().
+
+    models - модели (или имена поколений), от которых зависит ответ;
+    кешируются только ответы 200.
+    """
+    timeout = settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+    cache = _cache()
+    key = _cache_key(request)
+    lock_key = key + ':lock'
+    current = generations.current_many(generations.names(models))
+
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None and entry['generations'] == current and now < entry['fresh_until']:
+        return Response(entry['data'])
+
+    usable = entry is not None and now < entry['fresh_until'] + settings.RESPONSE_CACHE_STALE_TIMEOUT
+    locked = cache.add(lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if usable:
+            return Response(entry['data'])
+        # Пустой кеш: ждем, пока ответ посчитает захвативший блокировку запрос
+        deadline = now + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['generations'] == current:
+                return Response(entry['data'])
+        # Не дождались: считаем сами, но чужую блокировку не трогаем
+
+    try:
+        response = compute()
+        if response.status_code == 200:
+            cache.set(key, {
+                'data': response.data,
+                'generations': current,
+                'fresh_until': time.time() + timeout,
+            }, timeout + settings.RESPONSE_CACHE_STALE_TIMEOUT)
+        return response
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def cache_response(*models, timeout=None):
+    """Декоратор для функций-представлений (ставится под @api_view)"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return serve(request, models, lambda: view(request, *args, **kwargs), timeout)
+        return wrapped
+    return decorator
+
+
+class CachedResponseMixin:
+    """Кеширует GET-ответ представления; cache_models - модели, от которых он зависит"""
+    cache_models = ()
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        return serve(
+            request, self.cache_models,
+            lambda: super(CachedResponseMixin, self).get(request, *args, **kwargs),
+            self.cache_timeout,
+        )
@@ -0,0 +1,108 @@
+"""
+Полнотекстовый поиск по каталогу на PostgreSQL.
+
+Каждая зарегистрированная модель хранит взвешенный tsvector в поле
+search_vector (GIN-индекс), который обновляется при сохранении. Запрос
+ищется сразу по всем языковым конфигурациям из SEARCH_CONFIGS, а опечатки
+добираются триграммным сходством (pg_trgm) по короткому полю вроде названия.
+"""
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+SearchSpec = namedtuple('SearchSpec', ['fields', 'trigram_field'])
+
+_registry = {}
+
+
+def register(model, fields, trigram_field):
+    """Подключает модель к поиску: fields - пары (поле, вес A-D)"""
+    _registry[model] = SearchSpec(tuple(fields), trigram_field)
+    post_save.connect(
+        _update_on_save, sender=model, dispatch_uid=f'search_vector_{model._meta.label_lower}'
+    )
+
+
+def build_search_vector(fields):
+    """Взвешенный tsvector по полям для всех языковых конфигураций"""
+    vectors = [
+        SearchVector(field, weight=weight, config=config)
+        for config in settings.SEARCH_CONFIGS
+        for field, weight in fields
+    ]
+    return reduce(lambda left, right: left + right, vectors)
+
+
+def build_search_query(text):
+    return reduce(or_, [
+        SearchQuery(text, config=config, search_type='websearch')
+        for config in settings.SEARCH_CONFIGS
+    ])
+
+
+def update_search_vectors(queryset):
+    """Пересчитывает search_vector для всех строк queryset одним UPDATE"""
+    if connection.vendor != 'postgresql':
+        return 0
+    spec = _registry[queryset.model]
+    return queryset.update(search_vector=build_search_vector(spec.fields))
+
+
+def _update_on_save(sender, instance, update_fields=None, **kwargs):
+    spec = _registry[sender]
+    if update_fields is not None and not set(update_fields) & {field for field, _ in spec.fields}:
+        return
+    update_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+def search(queryset, text, ordered=True):
+    """
+    Ранжированный поиск по queryset зарегистрированной модели.
+
+    Находит строки, совпавшие по tsvector или похожие по триграммам, и
+    аннотирует их полем search_rank. При ordered=False сохраняет порядок queryset.
+    """
+    spec = _registry[queryset.model]
+    if connection.vendor != 'postgresql':
+        # Запасной вариант для разработки на SQLite
+        condition = reduce(or_, [Q(**{f'{field}__icontains': text}) for field, _ in spec.fields])
+        return queryset.filter(condition)
+
+    query = build_search_query(text)
+    results = queryset.filter(
+        Q(search_vector=query) | Q(**{f'{spec.trigram_field}__trigram_word_similar': text})
+    ).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+        + TrigramWordSimilarity(text, spec.trigram_field)
+    )
+    if ordered:
+        results = results.order_by('-search_rank', '-pk')
+    return results
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter на полнотекстовом движке.
+
+    Ставится после OrderingFilter: без явного ?ordering= результаты
+    сортируются по релевантности.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+        text = ' '.join(self.get_search_terms(request))
+        if not text:
+            return queryset
+        explicit_ordering = api_settings.ORDERING_PARAM in request.query_params
+        return search(queryset, text, ordered=not explicit_ordering)
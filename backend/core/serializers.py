@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from core import images
+
+
+class SrcsetField(serializers.Field):
+    """
+    Варианты изображения в формате srcset: {'webp': 'url 160w, url 480w', 'jpeg': ...}.
+    Пока варианты не построены - пустой объект (клиент использует оригинал).
+    """
+
+    def __init__(self, image_field='image', **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        return {
+            image_format: ', '.join(
+                f'{request.build_absolute_uri(url) if request else url} {width}w' for width, url in variants
+            )
+            for image_format, variants in images.variant_urls(instance, self.image_field).items()
+        }
@@ -0,0 +1,155 @@
+"""
+Буферизованные счетчики просмотров.
+
+Просмотры не пишутся в основную БД на каждый запрос: инкременты копятся
+в локальном SQLite-файле, общем для всех воркеров на хосте, и периодически
+сбрасываются пакетными UPDATE ... SET views_count = views_count + N.
+В той же транзакции отправляется сигнал views_flushed - по нему просмотры
+учитывают другие подсистемы (например, тренды в analytics.trending).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from core import generations
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_flush_lock = threading.Lock()
+_state = {'last_flush': time.monotonic()}
+
+# Отправляется внутри транзакции сброса; hits - [(метка модели, id объекта, просмотры)]
+views_flushed = Signal()
+
+
+def _get_connection():
+    """Соединение с буфером: свое для каждого потока и процесса"""
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.pid != os.getpid():
+        path = settings.VIEW_COUNTER_STORE
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS pending_views ('
+            'model TEXT NOT NULL, object_id INTEGER NOT NULL, hits INTEGER NOT NULL, '
+            'PRIMARY KEY (model, object_id))'
+        )
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return connection
+
+
+def _add_hits(connection, rows):
+    connection.executemany(
+        'INSERT INTO pending_views (model, object_id, hits) VALUES (?, ?, ?) '
+        'ON CONFLICT (model, object_id) DO UPDATE SET hits = hits + excluded.hits',
+        rows
+    )
+
+
+def record_view(instance):
+    """Учитывает просмотр объекта и возвращает число еще не сброшенных просмотров"""
+    connection = _get_connection()
+    key = (instance._meta.label_lower, instance.pk)
+    _add_hits(connection, [key + (1,)])
+    row = connection.execute(
+        'SELECT hits FROM pending_views WHERE model = ? AND object_id = ?', key
+    ).fetchone()
+    _maybe_flush()
+    return row[0] if row else 0
+
+
+def pending_views(model, object_ids):
+    """Возвращает {pk: просмотры}, еще не попавшие в БД"""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return {}
+    placeholders = ', '.join('?' * len(object_ids))
+    rows = _get_connection().execute(
+        f'SELECT object_id, hits FROM pending_views WHERE model = ? AND object_id IN ({placeholders})',
+        [model._meta.label_lower, *object_ids]
+    ).fetchall()
+    return dict(rows)
+
+
+def live_views_count(instance):
+    """Количество просмотров с учетом еще не сброшенных"""
+    return instance.views_count + pending_views(type(instance), [instance.pk]).get(instance.pk, 0)
+
+
+def flush():
+    """Сбрасывает накопленные просмотры в БД, возвращает число обновленных объектов"""
+    connection = _get_connection()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        rows = connection.execute('SELECT model, object_id, hits FROM pending_views').fetchall()
+        connection.execute('DELETE FROM pending_views')
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+
+    if not rows:
+        return 0
+    try:
+        _apply(rows)
+    except BaseException:
+        # Возвращаем инкременты в буфер, чтобы не потерять их
+        _add_hits(connection, rows)
+        raise
+    return len(rows)
+
+
+def _apply(rows):
+    grouped = defaultdict(lambda: defaultdict(list))
+    for label, object_id, hits in rows:
+        grouped[label][hits].append(object_id)
+
+    # Один UPDATE на каждое различное значение прироста
+    with transaction.atomic():
+        for label in sorted(grouped):
+            model = apps.get_model(label)
+            for hits, object_ids in sorted(grouped[label].items()):
+                model.objects.filter(pk__in=sorted(object_ids)).update(
+                    views_count=F('views_count') + hits
+                )
+        views_flushed.send(sender=None, hits=rows)
+    generations.bump(*(views_generation(apps.get_model(label)) for label in grouped))
+
+
+def views_generation(model):
+    """Поколение счетчиков просмотров модели (продвигается при каждом сбросе буфера)"""
+    return f'{generations.model_name(model)}.views'
+
+
+def _maybe_flush():
+    """Запускает фоновый сброс, если с прошлого прошло достаточно времени"""
+    now = time.monotonic()
+    if now - _state['last_flush'] < settings.VIEW_COUNTER_FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    _state['last_flush'] = now
+    threading.Thread(target=_background_flush, daemon=True).start()
+
+
+def _background_flush():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Не удалось сбросить счетчики просмотров')
+    finally:
+        connections.close_all()
+        _flush_lock.release()
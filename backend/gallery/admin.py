@@ -1,5 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from core.admin import LargeTableAdminMixin
+from core.images import preview_url
+from . import counters
 from .models import GalleryCategory, GalleryImage, ClientReview
 
 
@@ -13,12 +16,13 @@ class GalleryCategoryAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
 
     def images_count(self, obj):
-        return obj.images.filter(is_active=True).count()
+        return obj.active_images_count
     images_count.short_description = 'Количество изображений'
+    images_count.admin_order_field = 'active_images_count'
 
 
 @admin.register(GalleryImage)
-class GalleryImageAdmin(admin.ModelAdmin):
+class GalleryImageAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'title', 'image_preview', 'category', 'event_type', 
         'is_featured', 'is_active', 'views_count', 'created_at'
@@ -53,7 +57,7 @@ class GalleryImageAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" style="width: 80px; height: 60px; object-fit: cover; border-radius: 4px;" />',
-                obj.image.url
+                preview_url(obj, 160)
             )
         return "Нет изображения"
     image_preview.short_description = 'Превью'
@@ -64,28 +68,28 @@ class GalleryImageAdmin(admin.ModelAdmin):
     actions = ['mark_as_featured', 'unmark_as_featured', 'activate', 'deactivate']
 
     def mark_as_featured(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        updated = counters.update_images(queryset, is_featured=True)
         self.message_user(request, f'{updated} изображений отмечено как рекомендуемые.')
     mark_as_featured.short_description = 'Отметить как рекомендуемые'
 
     def unmark_as_featured(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        updated = counters.update_images(queryset, is_featured=False)
         self.message_user(request, f'{updated} изображений убрано из рекомендуемых.')
     unmark_as_featured.short_description = 'Убрать из рекомендуемых'
 
     def activate(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = counters.update_images(queryset, is_active=True)
         self.message_user(request, f'{updated} изображений активировано.')
     activate.short_description = 'Активировать'
 
     def deactivate(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = counters.update_images(queryset, is_active=False)
         self.message_user(request, f'{updated} изображений деактивировано.')
     deactivate.short_description = 'Деактивировать'
 
 
 @admin.register(ClientReview)
-class ClientReviewAdmin(admin.ModelAdmin):
+class ClientReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'name', 'rating_stars', 'gallery_image_link', 
         'is_featured', 'is_approved', 'created_at'
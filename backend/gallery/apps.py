@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class GalleryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gallery'
+
+    def ready(self):
+        from core import generations, images, search
+        from core.conditional import CATALOG
+        from . import counters
+        from .models import ClientReview, GalleryCategory, GalleryImage
+
+        for model in (GalleryCategory, GalleryImage, ClientReview):
+            generations.track(model, groups=[CATALOG])
+
+        search.register(
+            GalleryImage,
+            fields=[('title', 'A'), ('event_type', 'B'), ('location', 'B'), ('description', 'C')],
+            trigram_field='title',
+        )
+
+        images.register(GalleryImage)
+
+        counters.connect()
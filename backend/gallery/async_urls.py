@@ -0,0 +1,7 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('', async_views.GalleryImageListView.as_view(), name='async-gallery-list'),
+    path('reviews/', async_views.ClientReviewListView.as_view(), name='async-client-reviews'),
+]
@@ -0,0 +1,17 @@
+"""
+Асинхронные версии endpoint-ов чтения галереи (см. core.async_views)
+"""
+from core.async_views import AsyncListView
+from . import views
+
+
+class GalleryImageListView(AsyncListView):
+    """Список изображений галереи"""
+    view_class = views.GalleryImageListView
+
+
+class ClientReviewListView(AsyncListView):
+    """Список отзывов клиентов"""
+    view_class = views.ClientReviewListView
+    # Сериализатор изображения читает и его категорию
+    select_related = ('gallery_image__category',)
@@ -0,0 +1,85 @@
+"""
+Счетчики категорий галереи: число активных и рекомендуемых изображений и
+время последнего активного изображения хранятся в самой категории, чтобы
+список категорий читался одним запросом.
+
+Счетчики пересчитываются одним UPDATE с подзапросами в той же транзакции,
+что и изменение изображения (создание, удаление, перенос в другую категорию,
+смена is_active/is_featured). Массовые изменения изображений должны идти
+через update_images(). Расхождения исправляет команда reconcilegallerycounters.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from core import generations
+from .models import GalleryCategory, GalleryImage
+
+
+def expected_values():
+    """Выражения правильных значений счетчиков для queryset категорий"""
+    active = GalleryImage.objects.filter(category=OuterRef('pk'), is_active=True).order_by()
+
+    def count(queryset):
+        return Coalesce(
+            Subquery(queryset.values('category').annotate(total=Count('pk')).values('total'), output_field=IntegerField()),
+            0,
+        )
+
+    return {
+        'active_images_count': count(active),
+        'featured_images_count': count(active.filter(is_featured=True)),
+        'latest_image_at': Subquery(active.order_by('-created_at').values('created_at')[:1]),
+    }
+
+
+def refresh(category_ids):
+    """Пересчитывает счетчики категорий category_ids"""
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if not category_ids:
+        return 0
+    updated = GalleryCategory.objects.filter(pk__in=category_ids).update(**expected_values())
+    generations.touch(GalleryCategory)
+    return updated
+
+
+def update_images(queryset, **values):
+    """queryset.update(**values) для изображений с пересчетом счетчиков их категорий"""
+    category_ids = set(queryset.values_list('category_id', flat=True).distinct())
+    updated = queryset.update(**values)
+    if updated:
+        generations.touch(GalleryImage)
+        refresh(category_ids)
+    return updated
+
+
+# Сигналы
+
+COUNTED_FIELDS = {'category', 'category_id', 'is_active', 'is_featured', 'created_at'}
+
+
+def _affects_counters(raw, update_fields):
+    return not raw and (update_fields is None or bool(COUNTED_FIELDS & set(update_fields)))
+
+
+def _remember_category(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk and _affects_counters(raw, update_fields):
+        instance._previous_category_id = (
+            GalleryImage.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _affects_counters(raw, update_fields):
+        refresh({instance.category_id, getattr(instance, '_previous_category_id', None)})
+
+
+def _on_delete(sender, instance, **kwargs):
+    refresh({instance.category_id})
+
+
+def connect():
+    pre_save.connect(_remember_category, sender=GalleryImage, dispatch_uid='gallery_counters_pre_save')
+    post_save.connect(_on_save, sender=GalleryImage, dispatch_uid='gallery_counters_save')
+    post_delete.connect(_on_delete, sender=GalleryImage, dispatch_uid='gallery_counters_delete')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from gallery import counters
+from gallery.models import GalleryCategory
+
+FIELDS = ('active_images_count', 'featured_images_count', 'latest_image_at')
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики изображений категорий галереи с изображениями и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения')
+
+    def handle(self, *args, **options):
+        expected = {f'expected_{name}': value for name, value in counters.expected_values().items()}
+        drifted = []
+        for category in GalleryCategory.objects.annotate(**expected).order_by('pk'):
+            changes = [
+                f'{name}: {getattr(category, name)} -> {getattr(category, f"expected_{name}")}'
+                for name in FIELDS if getattr(category, name) != getattr(category, f'expected_{name}')
+            ]
+            if changes:
+                drifted.append(category.pk)
+                self.stdout.write(f'{category} (#{category.pk}): ' + ', '.join(changes))
+
+        if drifted and not options['dry_run']:
+            counters.refresh(drifted)
+        self.stdout.write(self.style.SUCCESS(
+            f'Расхождений: {len(drifted)}' + (' (не исправлены)' if drifted and options['dry_run'] else '')
+        ))
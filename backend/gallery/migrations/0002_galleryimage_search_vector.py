@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:35
+
+from functools import reduce
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Копия core.search на момент миграции: ее результат не должен меняться
+# вместе с текущими настройками поиска
+SEARCH_CONFIGS = ('russian', 'simple')
+SEARCH_FIELDS = [('title', 'A'), ('event_type', 'B'), ('location', 'B'), ('description', 'C')]
+
+
+def fill_search_vectors(apps, schema_editor):
+    model = apps.get_model('gallery', 'galleryimage')
+    vectors = [
+        django.contrib.postgres.search.SearchVector(field, weight=weight, config=config)
+        for config in SEARCH_CONFIGS
+        for field, weight in SEARCH_FIELDS
+    ]
+    model.objects.update(search_vector=reduce(lambda left, right: left + right, vectors))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='gallery_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='gallery_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
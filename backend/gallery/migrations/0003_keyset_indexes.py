@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0002_galleryimage_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientreview',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['-is_featured', '-created_at', '-id'], name='review_approved_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', '-created_at', '-id'], name='gallery_active_featured_idx'),
+        ),
+    ]
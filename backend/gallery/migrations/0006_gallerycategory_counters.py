@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:06
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    GalleryCategory = apps.get_model('gallery', 'GalleryCategory')
+    GalleryImage = apps.get_model('gallery', 'GalleryImage')
+    active = GalleryImage.objects.filter(category=OuterRef('pk'), is_active=True).order_by()
+
+    def count(queryset):
+        return Coalesce(
+            Subquery(queryset.values('category').annotate(total=Count('pk')).values('total'), output_field=IntegerField()),
+            0,
+        )
+
+    GalleryCategory.objects.update(
+        active_images_count=count(active),
+        featured_images_count=count(active.filter(is_featured=True)),
+        latest_image_at=Subquery(active.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_galleryimage_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gallerycategory',
+            name='active_images_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Активных изображений'),
+        ),
+        migrations.AddField(
+            model_name='gallerycategory',
+            name='featured_images_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рекомендуемых изображений'),
+        ),
+        migrations.AddField(
+            model_name='gallerycategory',
+            name='latest_image_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последнее изображение'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
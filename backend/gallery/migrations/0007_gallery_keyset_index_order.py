@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0006_gallerycategory_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='galleryimage',
+            name='gallery_active_featured_idx',
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', 'order', '-created_at', '-id'], name='gallery_active_featured_idx'),
+        ),
+    ]
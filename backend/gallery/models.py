@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -9,6 +11,11 @@ class GalleryCategory(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="Активна")
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
 
+    # Счетчики активных изображений, поддерживаются gallery.counters
+    active_images_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Активных изображений")
+    featured_images_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Рекомендуемых изображений")
+    latest_image_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Последнее изображение")
+
     class Meta:
         verbose_name = "Категория галереи"
         verbose_name_plural = "Категории галереи"
@@ -23,6 +30,13 @@ class GalleryImage(models.Model):
     title = models.CharField(max_length=200, verbose_name="Название")
     description = models.TextField(blank=True, verbose_name="Описание")
     image = models.ImageField(upload_to='gallery/', verbose_name="Изображение")
+    # Варианты и метаданные изображения, поддерживаются core.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина изображения")
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота изображения")
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Заглушка изображения")
     category = models.ForeignKey(
         GalleryCategory, 
         related_name='images', 
@@ -44,10 +58,22 @@ class GalleryImage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
+    # Поисковый вектор, поддерживается core.search при сохранении
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Изображение галереи"
         verbose_name_plural = "Изображения галереи"
         ordering = ['-is_featured', 'order', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='gallery_search_vector_idx'),
+            GinIndex(fields=['title'], name='gallery_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Keyset-пагинация списка изображений
+            models.Index(
+                fields=['-is_featured', 'order', '-created_at', '-id'], name='gallery_active_featured_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -83,6 +109,13 @@ class ClientReview(models.Model):
         verbose_name = "Отзыв клиента"
         verbose_name_plural = "Отзывы клиентов"
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            # Keyset-пагинация списка отзывов
+            models.Index(
+                fields=['-is_featured', '-created_at', '-id'], name='review_approved_featured_idx',
+                condition=models.Q(is_approved=True),
+            ),
+        ]
 
     def __str__(self):
         return f"Отзыв от {self.name} ({self.rating}/5)"
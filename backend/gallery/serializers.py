@@ -1,25 +1,27 @@
 from rest_framework import serializers
+from core.serializers import SrcsetField
 from .models import GalleryCategory, GalleryImage, ClientReview
 
 
 class GalleryCategorySerializer(serializers.ModelSerializer):
-    images_count = serializers.SerializerMethodField()
+    # Счетчики хранятся в категории (gallery.counters)
+    images_count = serializers.IntegerField(source='active_images_count', read_only=True)
     
     class Meta:
         model = GalleryCategory
-        fields = ['id', 'name', 'slug', 'description', 'images_count']
-    
-    def get_images_count(self, obj):
-        return obj.images.filter(is_active=True).count()
+        fields = ['id', 'name', 'slug', 'description', 'images_count', 'featured_images_count', 'latest_image_at']
 
 
 class GalleryImageSerializer(serializers.ModelSerializer):
     category = GalleryCategorySerializer(read_only=True)
+    srcset = SrcsetField()
     
     class Meta:
         model = GalleryImage
         fields = [
-            'id', 'title', 'description', 'image', 'category',
+            'id', 'title', 'description', 'image', 'srcset',
+            'image_width', 'image_height', 'image_size', 'image_color', 'image_placeholder',
+            'category',
             'event_type', 'location', 'event_date', 'is_featured',
             'views_count', 'created_at'
         ]
@@ -28,11 +30,14 @@ class GalleryImageSerializer(serializers.ModelSerializer):
 class GalleryImageListSerializer(serializers.ModelSerializer):
     """Упрощенный сериализатор для списка изображений"""
     category_name = serializers.CharField(source='category.name', read_only=True)
+    srcset = SrcsetField()
     
     class Meta:
         model = GalleryImage
         fields = [
-            'id', 'title', 'image', 'category_name', 'event_type',
+            'id', 'title', 'image', 'srcset',
+            'image_width', 'image_height', 'image_size', 'image_color', 'image_placeholder',
+            'category_name', 'event_type',
             'is_featured', 'views_count', 'created_at'
         ]
 
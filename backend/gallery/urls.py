@@ -8,6 +8,7 @@ urlpatterns = [
     # Изображения
     path('', views.GalleryImageListView.as_view(), name='gallery-list'),
     path('featured/', views.FeaturedGalleryView.as_view(), name='featured-gallery'),
+    path('trending/', views.TrendingGalleryView.as_view(), name='trending-gallery'),
     path('category/<slug:category_slug>/', views.GalleryByCategoryView.as_view(), name='gallery-by-category'),
     path('<int:pk>/', views.GalleryImageDetailView.as_view(), name='gallery-detail'),
     
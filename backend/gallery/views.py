@@ -1,6 +1,13 @@
 from rest_framework import generics, filters
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from core.conditional import ConditionalMixin
+from core.pagination import KeysetPagination
+from core.response_cache import CachedResponseMixin
+from core.search import FullTextSearchFilter
+from core.view_counters import record_view, views_generation
+from analytics import trending
+from analytics.models import TrendingScore
 from .models import GalleryCategory, GalleryImage, ClientReview
 from .serializers import (
     GalleryCategorySerializer, GalleryImageSerializer, 
@@ -9,47 +16,69 @@ from .serializers import (
 )
 
 
-class GalleryCategoryListView(generics.ListAPIView):
+class GalleryCategoryListView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Список категорий галереи"""
     queryset = GalleryCategory.objects.filter(is_active=True)
     serializer_class = GalleryCategorySerializer
+    cache_models = (GalleryCategory, GalleryImage)
+    version_models = (GalleryCategory, GalleryImage)
 
 
-class GalleryImageListView(generics.ListAPIView):
+class GalleryImageListView(ConditionalMixin, generics.ListAPIView):
     """Список изображений галереи"""
     queryset = GalleryImage.objects.filter(is_active=True).select_related('category')
     serializer_class = GalleryImageListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    version_models = (GalleryImage, GalleryCategory, views_generation(GalleryImage))
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'event_type', 'is_featured']
     search_fields = ['title', 'description', 'event_type', 'location']
     ordering_fields = ['created_at', 'views_count', 'event_date']
-    ordering = ['-is_featured', '-created_at']
+    # Порядок модели (с ручным order) - его обслуживает индекс gallery_active_featured_idx
+    ordering = ['-is_featured', 'order', '-created_at']
 
 
-class GalleryImageDetailView(generics.RetrieveAPIView):
+class GalleryImageDetailView(ConditionalMixin, generics.RetrieveAPIView):
     """Детальная информация об изображении"""
     queryset = GalleryImage.objects.filter(is_active=True).select_related('category')
     serializer_class = GalleryImageSerializer
+    version_models = (GalleryImage, GalleryCategory, views_generation(GalleryImage))
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Увеличиваем счетчик просмотров
-        instance.views_count += 1
-        instance.save(update_fields=['views_count'])
-        
+        # Просмотр попадет в БД при следующем сбросе буфера. В ответе - сохраненный
+        # views_count: ETag меняется только при сбросе, и тело должно меняться вместе с ним
+        record_view(instance)
+
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def not_modified(self, request, *args, **kwargs):
+        # Просмотр учитывается и тогда, когда клиенту хватает его копии
+        record_view(self.get_object())
 
-class FeaturedGalleryView(generics.ListAPIView):
+
+class FeaturedGalleryView(ConditionalMixin, generics.ListAPIView):
     """Рекомендуемые изображения"""
     queryset = GalleryImage.objects.filter(is_active=True, is_featured=True).select_related('category')
     serializer_class = GalleryImageListSerializer
+    version_models = (GalleryImage, GalleryCategory, views_generation(GalleryImage))
+
+
+class TrendingGalleryView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
+    """Изображения в тренде (просмотры с затуханием по времени)"""
+    serializer_class = GalleryImageListSerializer
+    cache_models = (GalleryImage, GalleryCategory, TrendingScore, views_generation(GalleryImage))
+    version_models = (GalleryImage, GalleryCategory, TrendingScore, views_generation(GalleryImage))
+
+    def get_queryset(self):
+        return trending.top_objects(GalleryImage.objects.filter(is_active=True).select_related('category'))
 
 
-class GalleryByCategoryView(generics.ListAPIView):
+class GalleryByCategoryView(ConditionalMixin, generics.ListAPIView):
     """Изображения по категории"""
     serializer_class = GalleryImageListSerializer
+    version_models = (GalleryImage, GalleryCategory, views_generation(GalleryImage))
     
     def get_queryset(self):
         category_slug = self.kwargs['category_slug']
@@ -60,10 +89,12 @@ class GalleryByCategoryView(generics.ListAPIView):
         ).select_related('category')
 
 
-class ClientReviewListView(generics.ListAPIView):
+class ClientReviewListView(ConditionalMixin, generics.ListAPIView):
     """Список отзывов клиентов"""
     queryset = ClientReview.objects.filter(is_approved=True).select_related('gallery_image')
     serializer_class = ClientReviewSerializer
+    version_models = (ClientReview, GalleryImage, GalleryCategory, views_generation(GalleryImage))
+    pagination_class = KeysetPagination
     ordering = ['-is_featured', '-created_at']
 
 
@@ -73,8 +104,10 @@ class ClientReviewCreateView(generics.CreateAPIView):
     serializer_class = ClientReviewCreateSerializer
 
 
-class FeaturedReviewsView(generics.ListAPIView):
+class FeaturedReviewsView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Рекомендуемые отзывы"""
     queryset = ClientReview.objects.filter(is_approved=True, is_featured=True).select_related('gallery_image')
     serializer_class = ClientReviewSerializer
+    cache_models = (ClientReview, GalleryImage, GalleryCategory, views_generation(GalleryImage))
+    version_models = (ClientReview, GalleryImage, GalleryCategory, views_generation(GalleryImage))
 
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
-from .models import Order, OrderItem
+from core.admin import LargeTableAdminMixin
+from .models import Order, OrderItem, DeliverySlot, DeliveryZone
 
 
 class OrderItemInline(admin.TabularInline):
@@ -14,7 +16,7 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'id', 'customer_name', 'customer_phone', 'status', 
         'delivery_date', 'total_with_delivery', 'created_at'
@@ -35,7 +37,7 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('customer_name', 'customer_phone', 'customer_email')
         }),
         ('Доставка', {
-            'fields': ('delivery_address', 'delivery_date', 'delivery_time')
+            'fields': ('delivery_address', 'delivery_date', 'delivery_time', 'delivery_slot')
         }),
         ('Заказ', {
             'fields': ('status', 'payment_method', 'total_amount', 'delivery_cost', 'total_with_delivery')
@@ -50,10 +52,7 @@ class OrderAdmin(admin.ModelAdmin):
         })
     )
     
-    readonly_fields = ['total_with_delivery', 'created_at', 'updated_at']
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('items')
+    readonly_fields = ['total_with_delivery', 'delivery_slot', 'created_at', 'updated_at']
 
     def total_with_delivery(self, obj):
         return f"{obj.total_with_delivery}₽"
@@ -62,32 +61,33 @@ class OrderAdmin(admin.ModelAdmin):
     actions = ['mark_as_confirmed', 'mark_as_preparing', 'mark_as_ready', 'mark_as_completed']
 
     def mark_as_confirmed(self, request, queryset):
-        updated = queryset.update(status='confirmed')
+        updated = queryset.update(status='confirmed', updated_at=timezone.now())
         self.message_user(request, f'{updated} заказов отмечено как подтвержденные.')
     mark_as_confirmed.short_description = 'Отметить как подтвержденные'
 
     def mark_as_preparing(self, request, queryset):
-        updated = queryset.update(status='preparing')
+        updated = queryset.update(status='preparing', updated_at=timezone.now())
         self.message_user(request, f'{updated} заказов отмечено как готовящиеся.')
     mark_as_preparing.short_description = 'Отметить как готовящиеся'
 
     def mark_as_ready(self, request, queryset):
-        updated = queryset.update(status='ready')
+        updated = queryset.update(status='ready', updated_at=timezone.now())
         self.message_user(request, f'{updated} заказов отмечено как готовые к доставке.')
     mark_as_ready.short_description = 'Отметить как готовые к доставке'
 
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = queryset.update(status='completed', updated_at=timezone.now())
         self.message_user(request, f'{updated} заказов отмечено как выполненные.')
     mark_as_completed.short_description = 'Отметить как выполненные'
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'order_link', 'product', 'selected_color',
         'quantity', 'price', 'total_price'
     ]
+    list_select_related = ['order', 'product', 'selected_color']
     list_filter = [
         'product__category', 'selected_color',
         'order__status', 'order__created_at'
@@ -98,7 +98,7 @@ class OrderItemAdmin(admin.ModelAdmin):
     readonly_fields = ['total_price']
 
     def order_link(self, obj):
-        url = reverse('admin:orders_order_change', args=[obj.order.id])
+        url = reverse('admin:orders_order_change', args=[obj.order_id])
         return format_html('<a href="{}">{}</a>', url, obj.order)
     order_link.short_description = 'Заказ'
     order_link.admin_order_field = 'order'
@@ -108,3 +108,22 @@ class OrderItemAdmin(admin.ModelAdmin):
     total_price.short_description = 'Итого'
 
 
+@admin.register(DeliveryZone)
+class DeliveryZoneAdmin(admin.ModelAdmin):
+    list_display = ['name', 'delivery_cost', 'min_order_amount', 'postal_codes', 'priority', 'is_active']
+    list_filter = ['is_active']
+    list_editable = ['is_active']
+    search_fields = ['name', 'postal_codes']
+
+
+@admin.register(DeliverySlot)
+class DeliverySlotAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'capacity', 'reserved', 'available', 'is_active']
+    list_filter = ['is_active', 'date']
+    list_editable = ['capacity', 'is_active']
+    readonly_fields = ['reserved']
+    date_hierarchy = 'date'
+
+    def available(self, obj):
+        return obj.available
+    available.short_description = 'Свободно'
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from core import generations
+        from . import slots
+        from .models import DeliverySlot, DeliveryZone
+
+        generations.track(DeliveryZone)
+        generations.track(DeliverySlot)
+        slots.connect()
@@ -0,0 +1,105 @@
+"""
+Потоковый экспорт заказов с позициями в CSV или JSON Lines.
+
+Заказы читаются курсором на сервере пачками по chunk_size, позиции каждой
+пачки - одним запросом с товаром и цветом; строки выдаются генератором,
+поэтому память не зависит от числа заказов. Один и тот же генератор
+используется endpoint-ом /api/orders/export/ и командой exportorders.
+В CSV одна строка на позицию (поля заказа повторяются), в JSON Lines -
+одна строка на заказ с вложенным списком позиций.
+"""
+import csv
+import datetime
+import json
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+ORDER_FIELDS = [
+    'id', 'created_at', 'status', 'customer_name', 'customer_phone', 'customer_email',
+    'delivery_address', 'delivery_date', 'delivery_time', 'payment_method',
+    'total_amount', 'delivery_cost', 'notes',
+]
+ITEM_FIELDS = [
+    'id', 'product_id', 'product__slug', 'product__name', 'selected_color__name',
+    'quantity', 'price', 'custom_text', 'notes',
+]
+# Имена полей позиции в выгрузке
+ITEM_COLUMNS = dict(zip(ITEM_FIELDS, [
+    'id', 'product_id', 'product_slug', 'product_name', 'color',
+    'quantity', 'price', 'custom_text', 'notes',
+]))
+CSV_COLUMNS = [f'order_{field}' for field in ORDER_FIELDS] + [f'item_{column}' for column in ITEM_COLUMNS.values()]
+
+
+def filter_orders(date_from=None, date_to=None, statuses=None):
+    """Заказы, созданные с date_from по date_to включительно, в статусах statuses"""
+    queryset = Order.objects.all()
+    if date_from:
+        queryset = queryset.filter(created_at__gte=_day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=_day_start(date_to + datetime.timedelta(days=1)))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def export_orders(queryset, chunk_size=2000):
+    """Заказы (словари) с ключом items - списком позиций, пачками по chunk_size"""
+    rows = queryset.order_by('id').values_list(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        items = defaultdict(list)
+        item_rows = OrderItem.objects.filter(order_id__in=[row[0] for row in chunk]).order_by('order_id', 'id')
+        for row in item_rows.values_list('order_id', *ITEM_FIELDS):
+            items[row[0]].append({
+                column: _value(value) for column, value in zip(ITEM_COLUMNS.values(), row[1:])
+            })
+        for row in chunk:
+            order = {field: _value(value) for field, value in zip(ORDER_FIELDS, row)}
+            order['items'] = items.pop(row[0], [])
+            yield order
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи"""
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset, output='csv', chunk_size=2000):
+    """Строки файла экспорта (с переводами строк)"""
+    orders = export_orders(queryset, chunk_size)
+    if output == 'jsonl':
+        for order in orders:
+            yield json.dumps(order, ensure_ascii=False) + '\n'
+        return
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    empty = [''] * len(ITEM_COLUMNS)
+    for order in orders:
+        head = [order[field] for field in ORDER_FIELDS]
+        if not order['items']:
+            yield writer.writerow(head + empty)
+        for item in order['items']:
+            yield writer.writerow(head + list(item.values()))
@@ -0,0 +1,45 @@
+import argparse
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.formats import detect_format
+from orders import export
+from orders.models import Order
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'некорректная дата: {value} (ожидается ГГГГ-ММ-ДД)')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заказы с позициями в CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для стандартного вывода')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='По умолчанию - по расширению файла')
+        parser.add_argument('--date-from', type=_date, help='Заказы, созданные с этой даты (ГГГГ-ММ-ДД)')
+        parser.add_argument('--date-to', type=_date, help='Заказы, созданные по эту дату включительно')
+        parser.add_argument(
+            '--status', action='append', choices=[value for value, _ in Order.STATUS_CHOICES],
+            help='Статус заказа (можно указать несколько раз)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        queryset = export.filter_orders(options['date_from'], options['date_to'], options['status'])
+        lines = export.export_lines(queryset, file_format, chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            sys.stdout.writelines(lines)
+            return
+        try:
+            with open(options['path'], 'w', encoding='utf-8', newline='') as file:
+                file.writelines(lines)
+        except OSError as error:
+            raise CommandError(error)
+        self.stderr.write(self.style.SUCCESS(f"Выгрузка сохранена в {options['path']}"))
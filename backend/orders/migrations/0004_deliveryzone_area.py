@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:01
+
+from django.db import migrations, models
+import orders.zones
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryzone',
+            name='boundary',
+            field=models.JSONField(blank=True, default=list, help_text='Многоугольник: список точек [широта, долгота]', validators=[orders.zones.validate_boundary], verbose_name='Граница зоны'),
+        ),
+        migrations.AddField(
+            model_name='deliveryzone',
+            name='postal_codes',
+            field=models.TextField(blank=True, help_text='Диапазоны через запятую или с новой строки: 00-001..04-999, 05-500', validators=[orders.zones.validate_postal_ranges], verbose_name='Почтовые индексы'),
+        ),
+        migrations.AddField(
+            model_name='deliveryzone',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=0, help_text='При пересечении зон выбирается зона с большим приоритетом', verbose_name='Приоритет'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_deliveryzone_area'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed', 'preparing', 'ready', 'delivering'])), fields=['delivery_date', 'delivery_time', 'status'], name='order_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ),
+    ]
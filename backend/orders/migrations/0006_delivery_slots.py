@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_board_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('start_time', models.TimeField(verbose_name='Начало')),
+                ('end_time', models.TimeField(verbose_name='Конец')),
+                ('capacity', models.PositiveIntegerField(verbose_name='Вместимость (заказов)')),
+                ('reserved', models.PositiveIntegerField(default=0, editable=False, verbose_name='Забронировано')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+            ],
+            options={
+                'verbose_name': 'Слот доставки',
+                'verbose_name_plural': 'Слоты доставки',
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryslot',
+            constraint=models.UniqueConstraint(fields=('date', 'start_time'), name='delivery_slot_unique_start'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='orders.deliveryslot', verbose_name='Слот доставки'),
+        ),
+    ]
@@ -1,6 +1,47 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from products.models import Product, Color
+from .zones import validate_boundary, validate_postal_ranges
+
+
+# Заказы в работе (по ним строится доска заказов)
+ACTIVE_STATUSES = ['pending', 'confirmed', 'preparing', 'ready', 'delivering']
+
+# Поля строки доски заказов
+BOARD_FIELDS = [
+    'id', 'delivery_date', 'delivery_time', 'status', 'customer_name', 'customer_phone',
+    'delivery_address', 'total_amount', 'delivery_cost', 'updated_at',
+]
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_items(self, slim=False):
+        """
+        Заказы с позициями за постоянное число запросов: позиции одним запросом
+        вместе с товаром и цветом, цвета товаров - еще одним (для полного
+        представления товара). slim - только то, что нужно краткому представлению.
+        """
+        items = OrderItem.objects.select_related('selected_color')
+        if slim:
+            items = items.select_related('product').only(
+                'id', 'order_id', 'quantity', 'price', 'custom_text', 'notes',
+                'product__id', 'product__name', 'product__slug',
+                'selected_color__id', 'selected_color__name', 'selected_color__hex_code',
+            )
+        else:
+            items = items.select_related('product__category').prefetch_related('product__colors')
+        return self.prefetch_related(models.Prefetch('items', queryset=items))
+
+    def on_board(self, date_from, date_to, statuses):
+        """Заказы с доставкой с date_from по date_to в статусах statuses"""
+        return self.filter(delivery_date__range=(date_from, date_to), status__in=statuses)
+
+    def board(self, date_from, date_to, statuses):
+        """Компактные строки доски заказов в порядке доставки, с числом позиций и штук"""
+        return self.on_board(date_from, date_to, statuses).annotate(
+            items_count=models.Count('items'),
+            items_quantity=models.Sum('items__quantity'),
+        ).only(*BOARD_FIELDS).order_by('delivery_date', 'delivery_time', 'status', 'id')
 
 
 class Order(models.Model):
@@ -34,6 +75,15 @@ class Order(models.Model):
     delivery_address = models.TextField(verbose_name="Адрес доставки")
     delivery_date = models.DateField(verbose_name="Дата доставки")
     delivery_time = models.TimeField(blank=True, null=True, verbose_name="Время доставки")
+    # Забронированный слот доставки (снимается при отмене заказа, см. orders.slots)
+    delivery_slot = models.ForeignKey(
+        'DeliverySlot',
+        related_name='orders',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        verbose_name="Слот доставки"
+    )
     
     # Детали заказа
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
@@ -49,10 +99,23 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-пагинация списка заказов
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            # Доска заказов: только заказы в работе, в порядке доставки
+            models.Index(
+                fields=['delivery_date', 'delivery_time', 'status'], name='order_board_idx',
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+            ),
+            # Опрос доски по updated_since
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Заказ #{self.id} от {self.customer_name}"
@@ -101,6 +164,24 @@ class DeliveryZone(models.Model):
         default=0, 
         verbose_name="Минимальная сумма заказа"
     )
+    postal_codes = models.TextField(
+        blank=True,
+        validators=[validate_postal_ranges],
+        verbose_name="Почтовые индексы",
+        help_text="Диапазоны через запятую или с новой строки: 00-001..04-999, 05-500"
+    )
+    boundary = models.JSONField(
+        default=list,
+        blank=True,
+        validators=[validate_boundary],
+        verbose_name="Граница зоны",
+        help_text="Многоугольник: список точек [широта, долгота]"
+    )
+    priority = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Приоритет",
+        help_text="При пересечении зон выбирается зона с большим приоритетом"
+    )
     is_active = models.BooleanField(default=True, verbose_name="Активна")
 
     class Meta:
@@ -111,3 +192,29 @@ class DeliveryZone(models.Model):
     def __str__(self):
         return f"{self.name} - {self.delivery_cost}₽"
 
+
+class DeliverySlot(models.Model):
+    """Слоты доставки с ограниченным числом заказов"""
+    date = models.DateField(verbose_name="Дата")
+    start_time = models.TimeField(verbose_name="Начало")
+    end_time = models.TimeField(verbose_name="Конец")
+    capacity = models.PositiveIntegerField(verbose_name="Вместимость (заказов)")
+    # Меняется только условным UPDATE в orders.slots
+    reserved = models.PositiveIntegerField(default=0, editable=False, verbose_name="Забронировано")
+    is_active = models.BooleanField(default=True, verbose_name="Активен")
+
+    class Meta:
+        verbose_name = "Слот доставки"
+        verbose_name_plural = "Слоты доставки"
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'start_time'], name='delivery_slot_unique_start'),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d.%m.%Y} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    @property
+    def available(self):
+        """Свободные места"""
+        return max(self.capacity - self.reserved, 0)
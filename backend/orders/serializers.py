@@ -1,6 +1,9 @@
+import datetime
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Order, OrderItem, DeliveryZone
-from products.models import Product, Color
+from .models import ACTIVE_STATUSES, BOARD_FIELDS, Order, OrderItem, DeliveryZone
+from . import services
 from products.serializers import ProductListSerializer, ColorSerializer
 
 
@@ -23,12 +26,35 @@ class OrderItemSerializer(serializers.ModelSerializer):
         ]
 
 
+class OrderItemSlimSerializer(serializers.ModelSerializer):
+    """Краткая позиция заказа (?items=slim): товар и цвет без вложенных объектов"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_slug = serializers.CharField(source='product.slug', read_only=True)
+    color_name = serializers.CharField(source='selected_color.name', read_only=True)
+    color_hex = serializers.CharField(source='selected_color.hex_code', read_only=True)
+    total_price = serializers.ReadOnlyField()
+
+    class Meta:
+        model = OrderItem
+        fields = [
+            'id', 'product', 'product_name', 'product_slug',
+            'selected_color', 'color_name', 'color_hex',
+            'custom_text', 'quantity', 'price', 'total_price', 'notes'
+        ]
+
+
 class OrderItemCreateSerializer(serializers.ModelSerializer):
+    # Товар и цвет проверяются одним запросом на весь заказ (orders.services),
+    # цена берется из товара
+    product = serializers.IntegerField(source='product_id')
+    selected_color = serializers.IntegerField(source='color_id')
+    quantity = serializers.IntegerField(min_value=1)
+
     class Meta:
         model = OrderItem
         fields = [
             'product', 'selected_color',
-            'custom_text', 'quantity', 'price', 'notes'
+            'custom_text', 'quantity', 'notes'
         ]
 
 
@@ -42,56 +68,60 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = [
             'id', 'customer_name', 'customer_phone', 'customer_email',
-            'delivery_address', 'delivery_date', 'delivery_time',
+            'delivery_address', 'delivery_date', 'delivery_time', 'delivery_slot',
             'status', 'status_display', 'payment_method', 'payment_method_display',
             'total_amount', 'delivery_cost', 'total_with_delivery',
             'notes', 'items', 'created_at', 'updated_at'
         ]
 
 
+class OrderSlimSerializer(OrderSerializer):
+    items = OrderItemSlimSerializer(many=True, read_only=True)
+
+
+class OrderBoardSerializer(serializers.ModelSerializer):
+    """Компактная строка доски заказов"""
+    items_count = serializers.IntegerField(read_only=True)
+    items_quantity = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = BOARD_FIELDS + ['items_count', 'items_quantity']
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     items = OrderItemCreateSerializer(many=True, write_only=True)
+    # Слот проверяется и бронируется в orders.services; дата и время берутся из него
+    delivery_slot = serializers.IntegerField(required=False, write_only=True)
     
     class Meta:
         model = Order
         fields = [
             'customer_name', 'customer_phone', 'customer_email',
-            'delivery_address', 'delivery_date', 'delivery_time',
+            'delivery_address', 'delivery_date', 'delivery_time', 'delivery_slot',
             'payment_method', 'total_amount', 'delivery_cost',
             'notes', 'items'
         ]
+        read_only_fields = ['total_amount']
+        extra_kwargs = {'delivery_date': {'required': False}}
+
+    def validate(self, data):
+        if 'delivery_slot' not in data and not data.get('delivery_date'):
+            raise serializers.ValidationError({'delivery_date': ['Укажите дату доставки или слот доставки']})
+        return data
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
-        
-        return order
+        return services.create_order(validated_data, items_data)
 
 
 class CartItemSerializer(serializers.Serializer):
-    """Сериализатор для элемента корзины"""
+    """Сериализатор для элемента корзины (товары и цвета проверяются в orders.services)"""
     product_id = serializers.IntegerField()
     color_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
     custom_text = serializers.CharField(max_length=200, required=False, allow_blank=True)
     notes = serializers.CharField(required=False, allow_blank=True)
-    
-    def validate_product_id(self, value):
-        try:
-            product = Product.objects.get(id=value, is_active=True)
-            return value
-        except Product.DoesNotExist:
-            raise serializers.ValidationError("Товар не найден")
-    
-    def validate_color_id(self, value):
-        try:
-            Color.objects.get(id=value, is_active=True)
-            return value
-        except Color.DoesNotExist:
-            raise serializers.ValidationError("Цвет не найден")
 
 
 class CartSerializer(serializers.Serializer):
@@ -103,3 +133,74 @@ class CartSerializer(serializers.Serializer):
             raise serializers.ValidationError("Корзина не может быть пустой")
         return value
 
+
+class QuoteSerializer(CartSerializer):
+    """Корзина для расчета стоимости (зона доставки - необязательно)"""
+    delivery_zone = serializers.IntegerField(required=False, allow_null=True)
+
+
+class DeliveryQuerySerializer(serializers.Serializer):
+    """Адрес для расчета доставки: почтовый индекс, адрес с индексом или координаты"""
+    postal_code = serializers.CharField(max_length=10, required=False)
+    delivery_address = serializers.CharField(required=False)
+    lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    lng = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    def validate(self, data):
+        if not (data.get('postal_code') or data.get('delivery_address') or 'lat' in data and 'lng' in data):
+            raise serializers.ValidationError('Укажите почтовый индекс, адрес или координаты')
+        return data
+
+
+class OrderExportSerializer(serializers.Serializer):
+    """Параметры выгрузки заказов"""
+    output = serializers.ChoiceField(choices=['csv', 'jsonl'], default='csv')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.MultipleChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+
+class OrderBoardQuerySerializer(serializers.Serializer):
+    """Параметры доски заказов (по умолчанию - заказы в работе на сегодня и завтра)"""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.MultipleChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    updated_since = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not data.get('status'):
+            data['status'] = ACTIVE_STATUSES
+        return data
+
+
+class SlotCalendarQuerySerializer(serializers.Serializer):
+    """Период календаря слотов (по умолчанию - две недели с сегодняшнего дня)"""
+    MAX_DAYS = 62
+    DEFAULT_DAYS = 14
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        # Период проверяется уже с подставленными датами: иначе одна date_to дала бы любой длины диапазон
+        date_from = data.setdefault('date_from', timezone.localdate())
+        date_to = data.setdefault('date_to', date_from + datetime.timedelta(days=self.DEFAULT_DAYS - 1))
+        if date_to < date_from:
+            raise serializers.ValidationError({'date_to': ['Конец периода раньше начала']})
+        if (date_to - date_from).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({'date_to': [f'Период не длиннее {self.MAX_DAYS} дней']})
+        return data
+
+
+class CartOrderSerializer(OrderCreateSerializer):
+    """Заказ из корзины: позиции в формате корзины (cart_items)"""
+    items = None
+    cart_items = CartItemSerializer(many=True, write_only=True)
+
+    class Meta(OrderCreateSerializer.Meta):
+        fields = [field for field in OrderCreateSerializer.Meta.fields if field != 'items'] + ['cart_items']
+
+    def create(self, validated_data):
+        items_data = validated_data.pop('cart_items')
+        return services.create_order(validated_data, items_data)
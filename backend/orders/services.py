@@ -0,0 +1,183 @@
+"""
+Создание заказов.
+
+Позиции заказа проверяются и оцениваются одним запросом товаров и одним
+запросом цветов, цена берется на сервере из final_price товара, позиции
+вставляются одним bulk_create - число запросов не зависит от числа позиций.
+Все изменения (включая бронирование слота доставки) выполняются в одной
+транзакции.
+
+Расчет корзины (quote) использует ту же проверку позиций и кешируется по
+хешу содержимого корзины и поколениям товаров, цветов и зон доставки:
+повторные расчеты, пока покупатель правит корзину, не трогают базу.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers
+
+from core import generations
+from products.models import Color, Product
+from . import slots, zones
+from .models import DeliveryZone, Order, OrderItem
+
+QUOTE_MODELS = (Product, Color, DeliveryZone)
+
+
+def price_items(items):
+    """
+    Проверяет позиции и считает их цены.
+
+    items - словари с product_id, color_id, quantity и необязательными
+    custom_text, notes. Возвращает список (позиция, товар, цвет, цена за единицу)
+    или выбрасывает ValidationError с ошибками по каждой позиции.
+    """
+    products = Product.objects.filter(is_active=True).in_bulk({item['product_id'] for item in items})
+    colors = Color.objects.filter(is_active=True).in_bulk({item['color_id'] for item in items})
+
+    lines, errors = [], []
+    for item in items:
+        product = products.get(item['product_id'])
+        color = colors.get(item['color_id'])
+        item_errors = {}
+        if product is None:
+            item_errors['product_id'] = ['Товар не найден']
+        elif not product.min_quantity <= item['quantity'] <= product.max_quantity:
+            item_errors['quantity'] = [
+                f'Количество должно быть от {product.min_quantity} до {product.max_quantity}'
+            ]
+        if color is None:
+            item_errors['color_id'] = ['Цвет не найден']
+        errors.append(item_errors)
+        if not item_errors:
+            lines.append((item, product, color, product.final_price))
+    if any(errors):
+        raise serializers.ValidationError({'items': errors})
+    return lines
+
+
+def create_order(order_data, items):
+    """
+    Создает заказ с позициями items (формат - как у price_items).
+    order_data - поля заказа; total_amount считается здесь, delivery_cost -
+    по зоне доставки, если она определяется по индексу в адресе. Если передан
+    delivery_slot, в нем бронируется место, а дата и время берутся из слота.
+    """
+    if not items:
+        raise serializers.ValidationError({'items': ['Корзина не может быть пустой']})
+    # Цены, зона и слот читаются в той же транзакции, что и вставка заказа
+    with transaction.atomic():
+        lines = price_items(items)
+        total_amount = sum(price * item['quantity'] for item, _, _, price in lines)
+        order_data = dict(order_data)
+        zone = zones.resolve(address=order_data.get('delivery_address'))
+        if zone is not None:
+            order_data['delivery_cost'] = zone.delivery_cost
+        slot = None
+        slot_id = order_data.pop('delivery_slot', None)
+        if slot_id is not None:
+            slot = slots.get_slot(slot_id)
+            order_data.update(delivery_slot=slot, delivery_date=slot.date, delivery_time=slot.start_time)
+        elif slots.has_slots(order_data['delivery_date']):
+            raise serializers.ValidationError({'delivery_slot': ['Выберите слот доставки на эту дату']})
+
+        order = Order.objects.create(**order_data, total_amount=total_amount)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                selected_color=color,
+                quantity=item['quantity'],
+                price=price,
+                custom_text=item.get('custom_text', ''),
+                notes=item.get('notes', ''),
+            )
+            for item, product, color, price in lines
+        ])
+        if slot is not None:
+            slots.reserve(slot)
+    return order
+
+
+def _money(value):
+    return str(Decimal(value).quantize(Decimal('0.01')))
+
+
+def delivery_quote(zone, total_amount=None):
+    """Стоимость доставки зоны и, если известна сумма заказа, проверка минимальной суммы"""
+    result = {
+        'delivery_zone': {'id': zone.id, 'name': zone.name},
+        'delivery_cost': _money(zone.delivery_cost),
+        'min_order_amount': _money(zone.min_order_amount),
+    }
+    if total_amount is not None:
+        missing = max(zone.min_order_amount - total_amount, Decimal('0'))
+        result['min_order_reached'] = not missing
+        result['missing_amount'] = _money(missing)
+    return result
+
+
+def _quote_key(items, zone_id):
+    cart = [
+        [item['product_id'], item['color_id'], item['quantity']] for item in items
+    ]
+    versions = generations.current_many(generations.names(QUOTE_MODELS))
+    payload = json.dumps([cart, zone_id, sorted(versions.items())], separators=(',', ':'))
+    return 'quote:' + hashlib.sha1(payload.encode()).hexdigest()
+
+
+def quote(items, zone_id=None):
+    """
+    Расчет корзины: суммы по позициям, скидки, доставка и проверка
+    минимальной суммы заказа зоны zone_id. Ошибки - как у price_items.
+    """
+    key = _quote_key(items, zone_id)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    zone = None
+    if zone_id is not None:
+        zone = zones.get_zone(zone_id)
+        if zone is None:
+            raise serializers.ValidationError({'delivery_zone': ['Зона доставки не найдена']})
+
+    lines = []
+    subtotal = discount_total = Decimal('0')
+    for item, product, color, price in price_items(items):
+        line_total = price * item['quantity']
+        discount = (product.base_price - price) * item['quantity']
+        subtotal += line_total
+        discount_total += discount
+        lines.append({
+            'product_id': product.pk,
+            'product_name': product.name,
+            'color_id': color.pk,
+            'color_name': color.name,
+            'quantity': item['quantity'],
+            'base_price': _money(product.base_price),
+            'price': _money(price),
+            'discount': _money(discount),
+            'line_total': _money(line_total),
+        })
+
+    result = {
+        'items': lines,
+        'subtotal': _money(subtotal),
+        'discount_total': _money(discount_total),
+        'delivery_zone': None,
+        'delivery_cost': None,
+        'min_order_amount': None,
+        'min_order_reached': None,
+        'missing_amount': None,
+        'total': _money(subtotal),
+    }
+    if zone is not None:
+        result.update(delivery_quote(zone, subtotal))
+        result['total'] = _money(subtotal + zone.delivery_cost)
+    cache.set(key, result, settings.QUOTE_CACHE_TIMEOUT)
+    return result
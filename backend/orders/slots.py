@@ -0,0 +1,95 @@
+"""
+Бронирование слотов доставки.
+
+Место в слоте занимается одним условным UPDATE
+(reserved = reserved + 1 WHERE reserved < capacity) последним запросом
+транзакции заказа: строка слота не блокируется через select_for_update
+на время оформления, поэтому одновременные заказы почти не ждут друг
+друга, а переполнить слот нельзя. При
+отмене или удалении заказа место возвращается. Календарь свободных слотов
+кешируется и сбрасывается при каждом бронировании (поколение DeliverySlot).
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from rest_framework import serializers
+
+from core import generations
+from .models import DeliverySlot, Order
+
+
+def _touch_on_commit():
+    """
+    Сбрасывает календарь после коммита: иначе параллельный запрос может
+    пересчитать его по еще не закоммиченным строкам и закешировать под новым
+    поколением
+    """
+    transaction.on_commit(lambda: generations.touch(DeliverySlot))
+
+
+def get_slot(slot_id):
+    """Активный слот (без блокировки) или ValidationError"""
+    slot = DeliverySlot.objects.filter(pk=slot_id, is_active=True).first()
+    if slot is None:
+        raise serializers.ValidationError({'delivery_slot': ['Слот доставки не найден']})
+    return slot
+
+
+def reserve(slot):
+    """
+    Занимает место в слоте или выбрасывает ValidationError. UPDATE держит
+    блокировку строки до конца транзакции, поэтому внутри транзакции его
+    стоит выполнять последним.
+    """
+    reserved = DeliverySlot.objects.filter(
+        pk=slot.pk, is_active=True, reserved__lt=F('capacity')
+    ).update(reserved=F('reserved') + 1)
+    if not reserved:
+        raise serializers.ValidationError({'delivery_slot': ['Слот доставки уже заполнен']})
+    _touch_on_commit()
+
+
+def release(slot_id):
+    """Возвращает место в слот"""
+    DeliverySlot.objects.filter(pk=slot_id, reserved__gt=0).update(reserved=F('reserved') - 1)
+    _touch_on_commit()
+
+
+def has_slots(date):
+    """Работает ли дата по слотам (заказ на нее без слота не принимается)"""
+    return DeliverySlot.objects.filter(date=date, is_active=True).exists()
+
+
+def calendar(date_from, date_to):
+    """Активные слоты по дням: [{'date', 'slots': [...]}, ...]"""
+    days = {}
+    slots = DeliverySlot.objects.filter(date__range=(date_from, date_to), is_active=True)
+    for slot in slots.order_by('date', 'start_time'):
+        days.setdefault(slot.date, []).append({
+            'id': slot.pk,
+            'start_time': slot.start_time,
+            'end_time': slot.end_time,
+            'available': slot.available,
+        })
+    return [{'date': date, 'slots': day_slots} for date, day_slots in days.items()]
+
+
+# Сигналы
+
+def _release_cancelled(sender, instance, raw=False, **kwargs):
+    if raw or instance.status != 'cancelled' or instance.delivery_slot_id is None:
+        return
+    # Снимаем слот с заказа условно: место вернет только один из одновременных вызовов
+    if Order.objects.filter(pk=instance.pk, delivery_slot_id=instance.delivery_slot_id).update(delivery_slot=None):
+        release(instance.delivery_slot_id)
+    instance.delivery_slot = None
+
+
+def _release_deleted(sender, instance, **kwargs):
+    if instance.delivery_slot_id is not None and instance.status != 'cancelled':
+        release(instance.delivery_slot_id)
+
+
+def connect():
+    post_save.connect(_release_cancelled, sender=Order, dispatch_uid='delivery_slot_release_cancelled')
+    post_delete.connect(_release_deleted, sender=Order, dispatch_uid='delivery_slot_release_deleted')
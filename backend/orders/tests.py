@@ -1,3 +1,46 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from .serializers import SlotCalendarQuerySerializer
+
+
+class SlotCalendarQuerySerializerTests(SimpleTestCase):
+    def validate(self, **params):
+        serializer = SlotCalendarQuerySerializer(data=params)
+        return serializer.is_valid(), serializer
+
+    def test_defaults_to_two_weeks_from_today(self):
+        valid, serializer = self.validate()
+        today = timezone.localdate()
+        self.assertTrue(valid)
+        self.assertEqual(serializer.validated_data['date_from'], today)
+        self.assertEqual(serializer.validated_data['date_to'], today + datetime.timedelta(days=13))
+
+    def test_only_date_to_is_limited_from_today(self):
+        valid, serializer = self.validate(date_to='2099-12-31')
+        self.assertFalse(valid)
+        self.assertIn('date_to', serializer.errors)
+
+    def test_only_date_to_within_limit(self):
+        date_to = timezone.localdate() + datetime.timedelta(days=SlotCalendarQuerySerializer.MAX_DAYS - 1)
+        valid, serializer = self.validate(date_to=date_to.isoformat())
+        self.assertTrue(valid)
+        self.assertEqual(serializer.validated_data['date_from'], timezone.localdate())
+
+    def test_only_date_to_before_today(self):
+        date_to = timezone.localdate() - datetime.timedelta(days=1)
+        valid, serializer = self.validate(date_to=date_to.isoformat())
+        self.assertFalse(valid)
+        self.assertIn('date_to', serializer.errors)
+
+    def test_only_date_from_gets_default_length(self):
+        valid, serializer = self.validate(date_from='2030-01-01')
+        self.assertTrue(valid)
+        self.assertEqual(serializer.validated_data['date_to'], datetime.date(2030, 1, 14))
+
+    def test_period_longer_than_limit(self):
+        valid, serializer = self.validate(date_from='2030-01-01', date_to='2030-03-04')
+        self.assertFalse(valid)
+        self.assertIn('date_to', serializer.errors)
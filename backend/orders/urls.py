@@ -4,11 +4,16 @@ from . import views
 urlpatterns = [
     
     # Заказы
+    path('', views.OrderListView.as_view(), name='order-list'),
     path('create/', views.OrderCreateView.as_view(), name='order-create'),
+    path('from-cart/', views.create_order_from_cart, name='order-from-cart'),
+    path('board/', views.order_board, name='order-board'),
+    path('export/', views.export_orders, name='order-export'),
     path('<int:pk>/', views.OrderDetailView.as_view(), name='order-detail'),
     
     # Утилиты
-    #path('calculate-cart/', views.calculate_cart, name='calculate-cart'),
-    #path('calculate-delivery/', views.calculate_delivery, name='calculate-delivery'),
+    path('delivery-slots/', views.delivery_slots, name='delivery-slots'),
+    path('quote/', views.quote_cart, name='order-quote'),
+    path('calculate-delivery/', views.calculate_delivery, name='calculate-delivery'),
 ]
 
@@ -1,27 +1,56 @@
+import datetime
+from collections import Counter
+
 from rest_framework import generics, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.contrib.auth.models import User
-from products.models import Product, Color  # Убрал Size из импорта
-from .models import Order, OrderItem
-from .serializers import OrderSerializer, OrderCreateSerializer, OrderItemSerializer
+from core.pagination import KeysetPagination
+from core.response_cache import cache_response
+from .models import DeliverySlot, Order
+from . import export, services, slots, zones
+from .serializers import (
+    OrderSerializer, OrderSlimSerializer, OrderCreateSerializer, OrderItemSerializer,
+    CartOrderSerializer, QuoteSerializer, DeliveryQuerySerializer, OrderExportSerializer,
+    OrderBoardSerializer, OrderBoardQuerySerializer, SlotCalendarQuerySerializer
+)
+
+
+class OrderReadMixin:
+    """
+    Чтение заказов с позициями за постоянное число запросов.
+    ?items=slim - краткие позиции без вложенных товаров
+    """
+    def is_slim(self):
+        return self.request.query_params.get('items') == 'slim'
+
+    def get_queryset(self):
+        return Order.objects.with_items(slim=self.is_slim())
+
+    def get_serializer_class(self):
+        return OrderSlimSerializer if self.is_slim() else OrderSerializer
 
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(OrderReadMixin, generics.ListAPIView):
     """
-    Список всех заказов
+    Список всех заказов (персональные данные клиентов - только для персонала)
     """
-    queryset = Order.objects.all().order_by('-created_at')
-    serializer_class = OrderSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
 
+    def get_queryset(self):
+        return super().get_queryset().order_by('-created_at')
 
-class OrderDetailView(generics.RetrieveAPIView):
+
+class OrderDetailView(OrderReadMixin, generics.RetrieveAPIView):
     """
     Детали конкретного заказа
     """
-    queryset = Order.objects.all()
-    serializer_class = OrderSerializer
 
 
 class OrderCreateView(generics.CreateAPIView):
@@ -53,59 +82,116 @@ def create_order_from_cart(request):
     """
     Создание заказа из корзины
     """
-    try:
-        # Получаем данные из запроса
-        customer_name = request.data.get('customer_name')
-        customer_email = request.data.get('customer_email')
-        customer_phone = request.data.get('customer_phone')
-        delivery_address = request.data.get('delivery_address')
-        cart_items = request.data.get('cart_items', [])
-
-        if not cart_items:
-            return Response(
-                {'error': 'Корзина пуста'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    serializer = CartOrderSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    order = serializer.save()
+
+    # Возвращаем созданный заказ
+    order = Order.objects.with_items().get(pk=order.pk)
+    return Response(OrderSerializer(order, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
 
-        # Создаем заказ
-        order = Order.objects.create(
-            customer_name=customer_name,
-            customer_email=customer_email,
-            customer_phone=customer_phone,
-            delivery_address=delivery_address,
-            status='pending'
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def order_board(request):
+    """
+    Доска заказов для сборки: заказы по дате, времени доставки и статусу.
+    С updated_since возвращает только заказы, измененные после этой метки
+    (и id заказов, которые с тех пор ушли с доски)
+    """
+    serializer = OrderBoardQuerySerializer(data={
+        **request.query_params.dict(), 'status': request.query_params.getlist('status')
+    })
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    date_from = params.get('date_from', timezone.localdate())
+    date_to = params.get('date_to', date_from + datetime.timedelta(days=1))
+    since = params.get('updated_since')
+    # Метка следующего опроса; перекрытие покрывает транзакции, которые
+    # сохранили заказ раньше, а зафиксировались позже этого запроса
+    watermark = timezone.now() - datetime.timedelta(seconds=settings.ORDER_BOARD_POLL_OVERLAP)
+
+    result = {'date_from': date_from, 'date_to': date_to, 'watermark': watermark}
+    board = Order.objects.board(date_from, date_to, params['status'])
+    if since:
+        on_board = Order.objects.on_board(date_from, date_to, params['status'])
+        result['orders'] = OrderBoardSerializer(board.filter(updated_at__gte=since), many=True).data
+        result['removed'] = list(
+            Order.objects.filter(updated_at__gte=since).exclude(pk__in=on_board.values('pk'))
+            .values_list('pk', flat=True)
         )
+    else:
+        result['orders'] = OrderBoardSerializer(board, many=True).data
+        groups = Counter((row['delivery_date'], row['delivery_time'], row['status']) for row in result['orders'])
+        result['groups'] = [
+            {'delivery_date': day, 'delivery_time': time, 'status': order_status, 'orders': count}
+            for (day, time, order_status), count in groups.items()
+        ]
+    return Response(result)
 
-        total_amount = 0
-
-        # Создаем элементы заказа
-        for item in cart_items:
-            product = get_object_or_404(Product, id=item['product_id'])
-            quantity = item['quantity']
-            
-            # Убрал логику с размерами, так как Size больше нет
-            order_item = OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price=product.price
-            )
-            
-            total_amount += product.price * quantity
 
-        # Обновляем общую сумму заказа
-        order.total_amount = total_amount
-        order.save()
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_orders(request):
+    """
+    Потоковая выгрузка заказов с позициями (CSV или JSON Lines)
+    """
+    serializer = OrderExportSerializer(data={
+        **request.query_params.dict(), 'status': request.query_params.getlist('status')
+    })
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    queryset = export.filter_orders(params.get('date_from'), params.get('date_to'), params.get('status'))
+    output = params['output']
+
+    response = StreamingHttpResponse(
+        export.export_lines(queryset, output),
+        content_type='text/csv; charset=utf-8' if output == 'csv' else 'application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="orders.{output}"'
+    return response
 
-        # Возвращаем созданный заказ
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    except Exception as e:
+@api_view(['GET'])
+@cache_response(DeliverySlot)
+def delivery_slots(request):
+    """
+    Календарь слотов доставки со свободными местами
+    """
+    serializer = SlotCalendarQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return Response(slots.calendar(
+        serializer.validated_data['date_from'], serializer.validated_data['date_to']
+    ))
+
+
+@api_view(['POST'])
+def quote_cart(request):
+    """
+    Расчет стоимости корзины: цены, скидки, доставка и минимальная сумма заказа
+    """
+    serializer = QuoteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response(services.quote(
+        serializer.validated_data['items'], serializer.validated_data.get('delivery_zone')
+    ))
+
+
+@api_view(['POST'])
+def calculate_delivery(request):
+    """
+    Зона и стоимость доставки по почтовому индексу, адресу или координатам
+    """
+    serializer = DeliveryQuerySerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    zone = zones.resolve(data.get('postal_code'), data.get('delivery_address'), data.get('lat'), data.get('lng'))
+    if zone is None:
         return Response(
-            {'error': str(e)}, 
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Адрес вне зоны доставки'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    return Response(services.delivery_quote(zone, data.get('total_amount')))
 
 
 @api_view(['PATCH'])
@@ -114,7 +200,7 @@ def update_order_status(request, order_id):
     Обновление статуса заказа
     """
     try:
-        order = get_object_or_404(Order, id=order_id)
+        order = get_object_or_404(Order.objects.with_items(), id=order_id)
         new_status = request.data.get('status')
         
         if new_status not in dict(Order.STATUS_CHOICES):
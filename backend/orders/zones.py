@@ -0,0 +1,208 @@
+"""
+Определение зоны доставки по почтовому индексу или координатам.
+
+Зона задается диапазонами почтовых индексов (postal_codes) и/или
+многоугольником границы (boundary). Активные зоны держатся в памяти
+процесса: диапазоны индексов разворачиваются в отсортированную таблицу
+непересекающихся отрезков с победившей зоной (при пересечении выигрывает
+больший priority, затем более узкий диапазон), поэтому поиск - один
+бинарный поиск. Многоугольники сначала отсекаются по ограничивающему
+прямоугольнику, затем проверяются лучом. Индекс перестраивается (одним
+запросом), когда меняется поколение зон доставки.
+"""
+import re
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+
+from core import generations
+
+POSTAL_CODE_RE = re.compile(r'\b(\d{2})-?(\d{3})\b')
+
+Zone = namedtuple('Zone', ['id', 'name', 'delivery_cost', 'min_order_amount'])
+Area = namedtuple('Area', ['min_lat', 'max_lat', 'min_lng', 'max_lng', 'points', 'key', 'zone'])
+
+
+# Разбор и проверка
+
+def normalize_postal_code(value):
+    """'00-950' / '00950' -> 950; None, если это не почтовый индекс"""
+    match = POSTAL_CODE_RE.fullmatch(value.strip())
+    return int(match.group(1) + match.group(2)) if match else None
+
+
+def find_postal_code(address):
+    """Первый почтовый индекс в тексте адреса (как число) или None"""
+    match = POSTAL_CODE_RE.search(address)
+    return int(match.group(1) + match.group(2)) if match else None
+
+
+def parse_postal_ranges(text):
+    """
+    Диапазоны индексов через запятую или с новой строки:
+    '00-001..04-999, 05-500' -> [(1, 4999), (5500, 5500)]
+    """
+    ranges = []
+    for part in re.split(r'[,;\n]+', text):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('..')
+        first = normalize_postal_code(start)
+        last = normalize_postal_code(end) if end else first
+        if first is None or last is None or first > last:
+            raise ValidationError(f'Некорректный диапазон индексов: {part}')
+        ranges.append((first, last))
+    return ranges
+
+
+def validate_postal_ranges(value):
+    parse_postal_ranges(value)
+
+
+def validate_boundary(value):
+    """Граница - список точек [широта, долгота], не меньше трех"""
+    if not value:
+        return
+    if not isinstance(value, list) or len(value) < 3:
+        raise ValidationError('Граница должна содержать не меньше трех точек')
+    for point in value:
+        if (
+            not isinstance(point, (list, tuple)) or len(point) != 2
+            or not all(isinstance(coordinate, (int, float)) for coordinate in point)
+            or not -90 <= point[0] <= 90 or not -180 <= point[1] <= 180
+        ):
+            raise ValidationError(f'Некорректная точка границы: {point}')
+
+
+# Геометрия
+
+def contains(points, lat, lng):
+    """Точка внутри многоугольника (метод луча)"""
+    inside = False
+    previous_lat, previous_lng = points[-1]
+    for point_lat, point_lng in points:
+        if (point_lng > lng) != (previous_lng > lng):
+            crossing = point_lat + (lng - point_lng) * (previous_lat - point_lat) / (previous_lng - point_lng)
+            if lat < crossing:
+                inside = not inside
+        previous_lat, previous_lng = point_lat, point_lng
+    return inside
+
+
+# Индекс
+
+class ZoneIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = ({}, [], [], [], [])
+        self.generation = None
+
+    def build(self):
+        """Построение из БД (один запрос)"""
+        from .models import DeliveryZone
+
+        name = generations.model_name(DeliveryZone)
+        generation = generations.current(name)
+        rows = DeliveryZone.objects.filter(is_active=True).values_list(
+            'pk', 'name', 'delivery_cost', 'min_order_amount', 'postal_codes', 'boundary', 'priority'
+        )
+
+        zones, ranges, areas = {}, [], []
+        for pk, zone_name, cost, min_amount, postal_codes, boundary, priority in rows:
+            zone = zones[pk] = Zone(pk, zone_name, cost, min_amount)
+            for first, last in parse_postal_ranges(postal_codes):
+                ranges.append((first, last, (-priority, last - first, pk), zone))
+            if boundary:
+                lats = [point[0] for point in boundary]
+                lngs = [point[1] for point in boundary]
+                area = (max(lats) - min(lats)) * (max(lngs) - min(lngs))
+                areas.append(Area(
+                    min(lats), max(lats), min(lngs), max(lngs),
+                    [tuple(point) for point in boundary], (-priority, area, pk), zone,
+                ))
+        areas.sort(key=lambda area: area.min_lat)
+
+        bounds, owners = self._segments(ranges)
+        with self._lock:
+            self._snapshot = (zones, bounds, owners, areas, [area.min_lat for area in areas])
+            self.generation = generation
+
+    @staticmethod
+    def _segments(ranges):
+        """
+        Разворачивает пересекающиеся диапазоны в отрезки [bounds[i], bounds[i + 1])
+        с победившей зоной owners[i] (None - индекс вне зон)
+        """
+        starts = sorted(ranges, key=lambda item: item[0])
+        points = sorted({item[0] for item in ranges} | {item[1] + 1 for item in ranges})
+        bounds, owners, active = [], [], []
+        position = 0
+        for point in points:
+            active = [item for item in active if item[1] >= point]
+            while position < len(starts) and starts[position][0] <= point:
+                active.append(starts[position])
+                position += 1
+            owner = min(active, key=lambda item: item[2])[3] if active else None
+            if owners and owners[-1] is owner:
+                continue
+            bounds.append(point)
+            owners.append(owner)
+        return bounds, owners
+
+    def zone(self, pk):
+        return self._snapshot[0].get(pk)
+
+    def by_postal_code(self, code):
+        _, bounds, owners, _, _ = self._snapshot
+        position = bisect_right(bounds, code) - 1
+        return owners[position] if position >= 0 else None
+
+    def by_point(self, lat, lng):
+        _, _, _, areas, min_lats = self._snapshot
+        best = None
+        # Кандидаты - многоугольники, чья нижняя граница не выше точки
+        for area in areas[:bisect_right(min_lats, lat)]:
+            if (
+                lat <= area.max_lat and area.min_lng <= lng <= area.max_lng
+                and (best is None or area.key < best.key) and contains(area.points, lat, lng)
+            ):
+                best = area
+        return best.zone if best else None
+
+    def is_stale(self):
+        from .models import DeliveryZone
+
+        return self.generation is None or generations.current(generations.model_name(DeliveryZone)) != self.generation
+
+
+index = ZoneIndex()
+
+
+def _current_index():
+    if index.is_stale():
+        index.build()
+    return index
+
+
+def get_zone(pk):
+    """Активная зона по id (без запроса к БД)"""
+    return _current_index().zone(pk)
+
+
+def resolve(postal_code=None, address=None, lat=None, lng=None):
+    """
+    Зона доставки по координатам (граница зоны), затем по почтовому индексу
+    (явному или найденному в адресе). None, если адрес вне зон доставки.
+    """
+    current = _current_index()
+    if lat is not None and lng is not None:
+        zone = current.by_point(lat, lng)
+        if zone is not None:
+            return zone
+    code = normalize_postal_code(postal_code) if postal_code else None
+    if code is None and address:
+        code = find_postal_code(address)
+    return current.by_postal_code(code) if code is not None else None
@@ -1,8 +1,26 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from core.admin import LargeTableAdminMixin
+from core.images import preview_url
 from .models import Product, Category, Color, Source
 
 
+class ColorListFilter(admin.SimpleListFilter):
+    """Фильтр по цвету подзапросом (без JOIN и DISTINCT по связи многие-ко-многим)"""
+    title = 'цвет'
+    parameter_name = 'color'
+
+    def lookups(self, request, model_admin):
+        return Color.objects.values_list('pk', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(
+                pk__in=Product.colors.through.objects.filter(color_id=self.value()).values('product_id')
+            )
+        return queryset
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'is_active', 'created_at']
@@ -37,13 +55,14 @@ class SourceAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'name', 'category', 'image_preview', 'base_price',
         'discount_price', 'is_active', 'is_featured', 'views_count'
     ]
+    list_select_related = ['category']
     list_filter = [
-        'category', 'colors', 'shape', 'theme',
+        'category', ColorListFilter, 'shape', 'theme',
         'is_active', 'is_featured', 'is_customizable', 'created_at'
     ]
     search_fields = ['name', 'description', 'short_description']
@@ -79,7 +98,7 @@ class ProductAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.image.url
+                preview_url(obj, 100)
             )
         return "Нет изображения"
 
@@ -90,7 +109,7 @@ class ProductAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" style="max-width: 300px; max-height: 300px; object-fit: contain;" />',
-                obj.image.url
+                preview_url(obj, 600)
             )
         return "Изображение не загружено"
 
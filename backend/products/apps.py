@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from core import generations, images, search
+        from core.conditional import CATALOG
+        from .models import Category, Color, Product, Source
+
+        for model in (Category, Color, Source, Product):
+            generations.track(model, groups=[CATALOG])
+
+        search.register(
+            Product,
+            fields=[('name', 'A'), ('short_description', 'B'), ('description', 'C')],
+            trigram_field='name',
+        )
+
+        for model in (Category, Product):
+            images.register(model)
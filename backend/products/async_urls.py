@@ -0,0 +1,8 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('', async_views.ProductListView.as_view(), name='async-product-list'),
+    path('filters/', async_views.product_filters, name='async-product-filters'),
+    path('<slug:slug>/', async_views.ProductDetailView.as_view(), name='async-product-detail'),
+]
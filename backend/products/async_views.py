@@ -0,0 +1,67 @@
+"""
+Асинхронные версии endpoint-ов чтения каталога (см. core.async_views)
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Min, Max
+from django.http import HttpResponseNotAllowed
+from core import conditional
+from core.async_views import AsyncDetailView, AsyncListView, render
+from core.view_counters import record_view
+from . import catalog_engine, views
+from .models import Category, Color, Source, Product
+
+
+class ProductListView(AsyncListView):
+    """Список товаров с фильтрацией"""
+    view_class = views.ProductListView
+    prefetch_related = ('colors',)
+
+    def get_source(self, view):
+        # Фильтры, сортировку и количество по возможности считает движок в памяти
+        if settings.CATALOG_ENGINE_ENABLED:
+            result = catalog_engine.engine.query(view.request.query_params)
+            if result is not None:
+                return result
+        return super().get_source(view)
+
+    async def fetch(self, view, source, start, stop):
+        if not isinstance(source, catalog_engine.CatalogResult):
+            return await super().fetch(view, source, start, stop)
+        ids = source.page_ids(start, stop)
+        products = self.related(Product.objects.filter(pk__in=ids).select_related('category'))
+        by_pk = {product.pk: product async for product in products}
+        return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+class ProductDetailView(AsyncDetailView):
+    """Детальная информация о товаре"""
+    view_class = views.ProductDetailView
+    prefetch_related = ('colors', 'sources')
+
+    async def retrieved(self, view, instance):
+        # Просмотр попадет в БД при следующем сбросе буфера (в ответе - сохраненный views_count)
+        await sync_to_async(record_view)(instance)
+
+    async def not_modified(self, view):
+        # Просмотр учитывается и тогда, когда клиенту хватает его копии
+        await sync_to_async(record_view)(await self.get_object(view))
+
+
+async def product_filters(request):
+    """Получение всех доступных фильтров"""
+    # Декораторы методов Django 4.2 не поддерживают асинхронные представления
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    async def compute():
+        categories = [category async for category in Category.objects.filter(is_active=True)]
+        colors = [color async for color in Color.objects.filter(is_active=True)]
+        sources = [source async for source in Source.objects.filter(is_active=True)]
+        price_range = await Product.objects.filter(is_active=True).aaggregate(
+            min_price=Min('base_price'), max_price=Max('base_price')
+        )
+        counts = await sync_to_async(views.filter_counts)(request.GET)
+        return render(views.filter_options(categories, colors, sources, price_range, counts))
+
+    return await conditional.aserve(request, (Product, Category, Color, Source), compute)
@@ -0,0 +1,206 @@
+"""
+Индекс автодополнения для строки поиска.
+
+Подсказки (товары, категории, тематики, формы) держатся в памяти процесса
+в виде отсортированного списка терминов, поэтому префиксный поиск - это
+бинарный поиск без обращения к БД. Индекс строится при старте воркера,
+точечно обновляется сигналами в процессе, изменившем данные, а остальные
+процессы перестраивают его в фоне, заметив новое поколение данных.
+"""
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from core import generations
+from .models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+SHAPE_LABELS = dict(Product.SHAPE_CHOICES)
+THEME_LABELS = dict(Product.THEME_CHOICES)
+
+
+def normalize(text):
+    """Нижний регистр без диакритики: 'Bałony Ślub' -> 'bałony slub'"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def _terms(label):
+    """Термины подсказки: вся строка и каждое слово, чтобы искать с начала любого слова"""
+    text = normalize(label)
+    words = text.split()
+    return {text, *words[1:]}
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._products = {}
+        self._categories = {}
+        self._snapshot = ([], [])
+        self._dirty = False
+        self.generations = {}
+        self.built_at = None
+        self._rebuilding = False
+
+    # Построение
+
+    def build(self):
+        """Полное построение из БД (два запроса)"""
+        names = [generations.model_name(Product), generations.model_name(Category)]
+        current = generations.current_many(names)
+        products = {
+            row['pk']: row for row in Product.objects.filter(is_active=True).values(
+                'pk', 'name', 'slug', 'category_id', 'theme', 'shape', 'views_count'
+            )
+        }
+        categories = {
+            row['pk']: row for row in Category.objects.filter(is_active=True).values('pk', 'name', 'slug')
+        }
+        with self._lock:
+            self._products = products
+            self._categories = categories
+            self._dirty = True
+            self.generations = current
+            self.built_at = time.monotonic()
+
+    def _rebuild_terms(self):
+        # Вес категории, тематики и формы - сумма просмотров ее активных товаров
+        weights = defaultdict(int)
+        suggestions = []
+        for product in self._products.values():
+            weights['category', product['category_id']] += product['views_count']
+            weights['theme', product['theme']] += product['views_count']
+            weights['shape', product['shape']] += product['views_count']
+            suggestions.append(({
+                'type': 'product', 'label': product['name'], 'slug': product['slug'],
+            }, product['views_count']))
+        for category in self._categories.values():
+            suggestions.append(({
+                'type': 'category', 'label': category['name'], 'slug': category['slug'],
+            }, weights['category', category['pk']]))
+        for kind, labels in (('theme', THEME_LABELS), ('shape', SHAPE_LABELS)):
+            for value, label in labels.items():
+                suggestions.append(({
+                    'type': kind, 'label': label, 'value': value,
+                }, weights[kind, value]))
+
+        terms = []
+        for number, (suggestion, weight) in enumerate(suggestions):
+            for term in _terms(suggestion['label']):
+                terms.append((term, number))
+        terms.sort()
+        self._snapshot = (terms, suggestions)
+        self._dirty = False
+
+    # Точечные обновления
+
+    def apply_product(self, change):
+        product = change.instance
+        if not isinstance(product, Product):
+            return
+        with self._lock:
+            if change.deleted or not product.is_active:
+                self._products.pop(product.pk, None)
+            else:
+                self._products[product.pk] = {
+                    'pk': product.pk, 'name': product.name, 'slug': product.slug,
+                    'category_id': product.category_id, 'theme': product.theme,
+                    'shape': product.shape, 'views_count': product.views_count,
+                }
+            self._adopt(change, generations.model_name(Product))
+
+    def apply_category(self, change):
+        category = change.instance
+        with self._lock:
+            if change.deleted or not category.is_active:
+                self._categories.pop(category.pk, None)
+            else:
+                self._categories[category.pk] = {
+                    'pk': category.pk, 'name': category.name, 'slug': category.slug,
+                }
+            self._adopt(change, generations.model_name(Category))
+
+    def _adopt(self, change, name):
+        self._dirty = True
+        # Если индекс был актуален до изменения, он актуален и после него
+        if self.generations.get(name) == change.previous:
+            self.generations[name] = change.generation
+
+    # Поиск
+
+    def suggest(self, query, limit):
+        """Лучшие по просмотрам подсказки, начинающиеся с query"""
+        prefix = normalize(query).strip()
+        if not prefix:
+            return []
+        if self._dirty:
+            with self._lock:
+                if self._dirty:
+                    self._rebuild_terms()
+        terms, suggestions = self._snapshot
+
+        matched = set()
+        position = bisect_left(terms, (prefix,))
+        while position < len(terms) and terms[position][0].startswith(prefix):
+            matched.add(terms[position][1])
+            position += 1
+        best = heapq.nlargest(limit, matched, key=lambda number: suggestions[number][1])
+        return [suggestions[number][0] for number in best]
+
+    # Актуальность
+
+    def is_stale(self):
+        if self.built_at is None:
+            return True
+        if time.monotonic() - self.built_at > settings.AUTOCOMPLETE_REFRESH_INTERVAL:
+            return True
+        return generations.current_many(list(self.generations)) != self.generations
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._background_build, daemon=True).start()
+
+    def _background_build(self):
+        try:
+            self.build()
+        except DatabaseError:
+            logger.exception('Не удалось перестроить индекс автодополнения')
+        finally:
+            connections.close_all()
+            self._rebuilding = False
+
+
+index = AutocompleteIndex()
+
+
+def warm():
+    """Строит индекс при старте воркера; при недоступной БД он построится при первом запросе"""
+    try:
+        index.build()
+    except DatabaseError:
+        logger.warning('Индекс автодополнения не построен: база данных недоступна')
+
+
+def suggest(query, limit=8):
+    if index.built_at is None:
+        index.build()
+    elif index.is_stale():
+        # Пока индекс перестраивается, отвечаем по прежнему
+        index.refresh_in_background()
+    return index.suggest(query, limit)
+
+
+generations.on_change(Product, index.apply_product)
+generations.on_change(Category, index.apply_category)
@@ -0,0 +1,251 @@
+"""
+Колоночный движок каталога в памяти.
+
+Активные товары загружаются в компактные колонки (array) и битовые маски
+по каждому значению фасета: маска - это int, где бит i означает строку i.
+Фильтр - AND/OR масок, количество - popcount, сортировка - заранее
+посчитанные перестановки строк. Так список товаров, его количество и
+счетчики по значениям фасетов считаются без запросов к БД; из базы
+читается только текущая страница.
+
+Движок включается настройкой CATALOG_ENGINE_ENABLED. Каждый процесс держит
+свой снимок и перестраивает его, когда меняется поколение товаров,
+цветов или источников.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+from core import generations
+from .models import Color, Product, Source
+
+FACETS = ('category', 'colors', 'sources', 'shape', 'theme', 'is_featured')
+SORT_FIELDS = ('created_at', 'base_price', 'views_count', 'name')
+DEFAULT_ORDERING = '-created_at'
+
+# Параметры списка, которые движок понимает (остальные, например search,
+# обрабатываются обычным путем через ORM)
+SUPPORTED_PARAMS = set(FACETS) | {'min_price', 'max_price', 'ordering', 'page', 'page_size', 'format'}
+
+
+def _bitset(rows, size):
+    """Маска из номеров строк"""
+    buffer = bytearray((size + 7) // 8)
+    for row in rows:
+        buffer[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class CatalogSnapshot:
+    def __init__(self, products, colors, sources):
+        self.size = len(products)
+        self.ids = array('q', (product['pk'] for product in products))
+        self.prices = array('d', (float(product['base_price']) for product in products))
+        self.all = (1 << self.size) - 1
+
+        position = {pk: row for row, pk in enumerate(self.ids)}
+        members = {facet: defaultdict(list) for facet in FACETS}
+        for row, product in enumerate(products):
+            for facet in ('category', 'shape', 'theme', 'is_featured'):
+                members[facet][product[facet]].append(row)
+        for facet, links in (('colors', colors), ('sources', sources)):
+            for product_id, value in links:
+                if product_id in position:
+                    members[facet][value].append(position[product_id])
+        self.facets = {
+            facet: {value: _bitset(rows, self.size) for value, rows in values.items()}
+            for facet, values in members.items()
+        }
+
+        # Перестановки строк по возрастанию каждого поля сортировки (pk - для устойчивости)
+        keys = {
+            'created_at': lambda row: (products[row]['created_at'], self.ids[row]),
+            'base_price': lambda row: (self.prices[row], self.ids[row]),
+            'views_count': lambda row: (products[row]['views_count'], self.ids[row]),
+            'name': lambda row: (products[row]['name'].casefold(), self.ids[row]),
+        }
+        self.orders = {
+            field: array('l', sorted(range(self.size), key=key)) for field, key in keys.items()
+        }
+        self.sorted_prices = array('d', (self.prices[row] for row in self.orders['base_price']))
+
+    @classmethod
+    def load(cls):
+        """Загрузка из БД: товары и две таблицы связей"""
+        products = list(Product.objects.filter(is_active=True).order_by('pk').values(
+            'pk', 'category', 'shape', 'theme', 'is_featured',
+            'base_price', 'views_count', 'created_at', 'name'
+        ))
+        colors = Product.colors.through.objects.values_list('product_id', 'color_id')
+        sources = Product.sources.through.objects.values_list('product_id', 'source_id')
+        return cls(products, list(colors), list(sources))
+
+    def price_bits(self, low, high):
+        start = 0 if low is None else bisect_left(self.sorted_prices, low)
+        stop = self.size if high is None else bisect_right(self.sorted_prices, high)
+        if start == 0 and stop == self.size:
+            return self.all
+        return _bitset(self.orders['base_price'][start:stop], self.size)
+
+    def filter_bits(self, criteria, skip=None):
+        """Маска строк под фильтром; skip - фасет, который не учитывать (для счетчиков)"""
+        bits = self.price_bits(criteria['min_price'], criteria['max_price'])
+        for facet in FACETS:
+            values = criteria[facet]
+            if facet == skip or not values:
+                continue
+            union = 0
+            for value in values:
+                union |= self.facets[facet].get(value, 0)
+            bits &= union
+        return bits
+
+    def facet_counts(self, criteria):
+        """{фасет: {значение: количество}} при текущих значениях остальных фасетов"""
+        counts = {}
+        for facet in FACETS:
+            bits = self.filter_bits(criteria, skip=facet)
+            counts[facet] = {
+                value: (bits & member).bit_count() for value, member in self.facets[facet].items()
+            }
+        return counts
+
+    def page(self, bits, ordering, start, stop):
+        """pk строк маски с start по stop в порядке ordering"""
+        descending = ordering.startswith('-')
+        order = self.orders[ordering.lstrip('-')]
+        if descending:
+            order = reversed(order)
+        mask = bits.to_bytes((self.size + 7) // 8, 'little')
+        found = 0
+        ids = []
+        for row in order:
+            if mask[row >> 3] >> (row & 7) & 1:
+                if found >= start:
+                    ids.append(self.ids[row])
+                found += 1
+                if found >= stop:
+                    break
+        return ids
+
+
+class CatalogResult:
+    """Отфильтрованный список: пагинатор работает с ним как с queryset"""
+
+    def __init__(self, snapshot, bits, ordering):
+        self.snapshot = snapshot
+        self.bits = bits
+        self.ordering = ordering
+
+    def count(self):
+        return self.bits.bit_count()
+
+    def __len__(self):
+        return self.count()
+
+    def page_ids(self, start, stop):
+        """id товаров строк start..stop в порядке сортировки (без запросов к БД)"""
+        start, stop, _ = slice(start, stop).indices(self.count())
+        return self.snapshot.page(self.bits, self.ordering, start, stop)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        ids = self.page_ids(item.start, item.stop)
+        products = Product.objects.filter(pk__in=ids).select_related('category').prefetch_related('colors')
+        by_pk = {product.pk: product for product in products}
+        return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+def parse_criteria(params):
+    """
+    Разбирает параметры списка товаров. Возвращает None, если запрос движку
+    не по силам или параметры некорректны - тогда его обработает ORM.
+    """
+    if set(params) - SUPPORTED_PARAMS:
+        return None
+    try:
+        criteria = {
+            'category': [int(value) for value in params.getlist('category') if value],
+            'colors': [int(value) for value in params.getlist('colors') if value],
+            'sources': [int(value) for value in params.getlist('sources') if value],
+            'shape': [value for value in params.getlist('shape') if value],
+            'theme': [value for value in params.getlist('theme') if value],
+            'is_featured': [],
+            'min_price': None,
+            'max_price': None,
+        }
+        for value in params.getlist('is_featured'):
+            flag = {'true': True, '1': True, 'false': False, '0': False}.get(value.lower())
+            if flag is None and value:
+                return None
+            if flag is not None:
+                criteria['is_featured'].append(flag)
+        for name in ('min_price', 'max_price'):
+            if params.get(name):
+                criteria[name] = float(Decimal(params[name]))
+    except (ValueError, InvalidOperation):
+        return None
+
+    ordering = params.get('ordering') or DEFAULT_ORDERING
+    if ordering.lstrip('-') not in SORT_FIELDS:
+        return None
+    criteria['ordering'] = ordering
+    return criteria
+
+
+class CatalogEngine:
+    models = (Product, Color, Source)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.generations = {}
+        self.built_at = None
+
+    def invalidate(self, change=None):
+        self._snapshot = None
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_stale():
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._is_stale():
+                names = [generations.model_name(model) for model in self.models]
+                self.generations = generations.current_many(names)
+                self._snapshot = CatalogSnapshot.load()
+                self.built_at = time.monotonic()
+            return self._snapshot
+
+    def _is_stale(self):
+        if self._snapshot is None:
+            return True
+        if time.monotonic() - self.built_at > settings.CATALOG_ENGINE_REFRESH_INTERVAL:
+            return True
+        return generations.current_many(list(self.generations)) != self.generations
+
+    def query(self, params):
+        """CatalogResult для параметров списка товаров или None"""
+        criteria = parse_criteria(params)
+        if criteria is None:
+            return None
+        snapshot = self.snapshot()
+        return CatalogResult(snapshot, snapshot.filter_bits(criteria), criteria['ordering'])
+
+    def facet_counts(self, params):
+        criteria = parse_criteria(params)
+        if criteria is None:
+            return None
+        return self.snapshot().facet_counts(criteria)
+
+
+engine = CatalogEngine()
+
+for _model in CatalogEngine.models:
+    generations.on_change(_model, engine.invalidate)
@@ -0,0 +1,362 @@
+"""
+Массовый импорт и экспорт каталога товаров (CSV и JSON Lines).
+
+Файл читается и пишется потоком, пачками по batch_size строк, поэтому
+память не зависит от размера каталога. На каждую пачку импорта - один
+запрос на поиск категорий, цветов и источников, один на существующие
+товары, bulk_create/bulk_update и пакетная вставка связей M2M. Товары
+сопоставляются по slug: существующие обновляются, новые создаются.
+"""
+import csv
+import json
+import time
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from core import generations, search
+from .models import Category, Color, Product, Source
+
+COLUMNS = [
+    'slug', 'name', 'short_description', 'description', 'category', 'colors', 'sources',
+    'shape', 'theme', 'base_price', 'discount_price', 'min_quantity', 'max_quantity',
+    'is_customizable', 'custom_text_available', 'is_active', 'is_featured', 'image',
+]
+TEXT_FIELDS = ('name', 'short_description', 'description', 'image')
+DECIMAL_FIELDS = ('base_price', 'discount_price')
+INTEGER_FIELDS = ('min_quantity', 'max_quantity')
+BOOLEAN_FIELDS = ('is_customizable', 'custom_text_available', 'is_active', 'is_featured')
+# Поля, без которых товар нельзя создать
+REQUIRED_FIELDS = ('name', 'description', 'short_description', 'category', 'shape', 'theme', 'base_price')
+
+# bulk_update строит CASE WHEN на каждую строку, поэтому обновления идут пачками поменьше
+UPDATE_BATCH_SIZE = 100
+
+# Разделитель значений M2M в CSV: "Красный|Белый"
+LIST_SEPARATOR = '|'
+
+BOOLEAN_VALUES = {
+    'true': True, '1': True, 'yes': True, 'tak': True, 'да': True,
+    'false': False, '0': False, 'no': False, 'nie': False, 'нет': False,
+}
+SHAPES = {value for value, _ in Product.SHAPE_CHOICES}
+THEMES = {value for value, _ in Product.THEME_CHOICES}
+
+
+class RowError(ValueError):
+    """Ошибка в строке файла импорта"""
+
+
+# Чтение и запись файлов
+
+def read_rows(file, file_format):
+    """
+    Строки файла в виде словарей (для CSV - значения-строки). Вместо
+    неразборчивой строки JSON Lines выдается RowError: импорт сообщает о ней
+    и продолжает со следующей
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield RowError(f'неверный JSON: {error}')
+
+
+def write_rows(file, file_format, rows):
+    if file_format == 'csv':
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                key: LIST_SEPARATOR.join(value) if isinstance(value, list) else
+                ('true' if value else 'false') if isinstance(value, bool) else
+                '' if value is None else value
+                for key, value in row.items()
+            })
+        return
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+
+# Разбор строки
+
+def _split(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in (value or '').split(LIST_SEPARATOR) if item.strip()]
+
+
+def parse_row(row):
+    """Приводит значения строки к типам модели; возвращает только заданные столбцы"""
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('строка должна быть объектом JSON')
+    slug = str(row.get('slug') or '').strip()
+    if not slug:
+        raise RowError('не указан slug')
+    try:
+        validate_slug(slug)
+    except ValidationError:
+        raise RowError(f'неверный slug: {slug}')
+    parsed = {'slug': slug}
+    for key, value in row.items():
+        if key not in COLUMNS or key == 'slug':
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, '') and key in INTEGER_FIELDS + BOOLEAN_FIELDS:
+            # Пустая ячейка CSV: значение по умолчанию для нового товара, без изменений для существующего
+            continue
+        try:
+            if key in ('colors', 'sources'):
+                parsed[key] = _split(value)
+            elif key in TEXT_FIELDS or key == 'category':
+                value = str(value or '')
+                max_length = Product._meta.get_field(key).max_length
+                if max_length and len(value) > max_length:
+                    raise RowError(f'{key} длиннее {max_length} символов')
+                parsed[key] = value
+            elif key in DECIMAL_FIELDS:
+                parsed[key] = Decimal(str(value)) if value not in (None, '') else None
+            elif key in INTEGER_FIELDS:
+                parsed[key] = int(value)
+                if parsed[key] < 0:
+                    raise ValueError
+            elif key in BOOLEAN_FIELDS:
+                parsed[key] = value if isinstance(value, bool) else BOOLEAN_VALUES[str(value).lower()]
+            elif key in ('shape', 'theme'):
+                if value not in (SHAPES if key == 'shape' else THEMES):
+                    raise RowError(f'неизвестное значение {key}: {value}')
+                parsed[key] = value
+        except (ValueError, InvalidOperation, KeyError):
+            raise RowError(f'неверное значение {key}: {value}')
+    if parsed.get('base_price', 0) is None:
+        raise RowError('не указана base_price')
+    return parsed
+
+
+# Импорт
+
+class CatalogImporter:
+    def __init__(self, batch_size=1000, dry_run=False, log=None, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        # log - ошибки в строках, progress - скорость по пачкам
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda message: None)
+        self.created = self.updated = self.failed = 0
+        self.changed = False
+
+    def run(self, rows):
+        started = time.monotonic()
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            batch_started = time.monotonic()
+            self.import_batch(batch)
+            elapsed = time.monotonic() - batch_started
+            self.progress(f'Строки до {batch[-1][0]}: {len(batch) / elapsed:.0f} строк/с')
+        if self.changed:
+            generations.touch(Product)
+        elapsed = time.monotonic() - started
+        total = self.created + self.updated
+        return {
+            'created': self.created, 'updated': self.updated, 'failed': self.failed,
+            'seconds': elapsed, 'rate': total / elapsed if elapsed else 0,
+        }
+
+    def error(self, number, message):
+        self.failed += 1
+        self.log(f'Строка {number}: {message}')
+
+    def import_batch(self, batch):
+        parsed = {}
+        for number, row in batch:
+            try:
+                values = parse_row(row)
+            except RowError as error:
+                self.error(number, error)
+                continue
+            # Повтор slug в пачке: побеждает последняя строка
+            parsed[values['slug']] = (number, values)
+
+        categories, colors, sources = self.resolve(values for _, values in parsed.values())
+        existing = {
+            product.slug: product
+            for product in Product.objects.filter(slug__in=list(parsed)).defer('search_vector')
+        }
+
+        to_create, to_update, links = [], [], []
+        update_fields = set()
+        now = timezone.now()
+        for slug, (number, values) in parsed.items():
+            try:
+                fields = self.model_values(values, categories)
+                row_links = self.row_links(values, colors, sources)
+            except RowError as error:
+                self.error(number, error)
+                continue
+            product = existing.get(slug)
+            if product is None:
+                missing = [name for name in REQUIRED_FIELDS if not values.get(name)]
+                if missing:
+                    self.error(number, 'не заполнены поля ' + ', '.join(missing))
+                    continue
+                product = Product(slug=slug, **fields)
+                to_create.append(product)
+            else:
+                # Пишем только изменившиеся поля; неизмененные товары не обновляются вовсе
+                changed = {name for name, value in fields.items() if getattr(product, name) != value}
+                for name in changed:
+                    setattr(product, name, fields[name])
+                if changed:
+                    product.updated_at = now
+                    update_fields.update(changed)
+                    to_update.append(product)
+            links.extend((product, relation, ids) for relation, ids in row_links)
+
+        if self.dry_run:
+            self.created += len(to_create)
+            self.updated += len(to_update)
+            return
+
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if to_update:
+                Product.objects.bulk_update(
+                    to_update, sorted(update_fields | {'updated_at'}),
+                    batch_size=min(self.batch_size, UPDATE_BATCH_SIZE),
+                )
+            relinked = self.save_links(links)
+            ids = [product.pk for product in to_create + to_update]
+            search.update_search_vectors(Product.objects.filter(pk__in=ids))
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+        self.changed = self.changed or bool(ids or relinked)
+
+    def resolve(self, rows):
+        """Категории (по slug или названию), цвета и источники (по названию) - по запросу на модель"""
+        rows = list(rows)
+        category_keys = {values['category'] for values in rows if values.get('category')}
+        color_names = {name for values in rows for name in values.get('colors', [])}
+        source_names = {name for values in rows for name in values.get('sources', [])}
+
+        categories = {}
+        if category_keys:
+            for category in Category.objects.filter(Q(slug__in=category_keys) | Q(name__in=category_keys)):
+                categories[category.slug] = category.pk
+                categories.setdefault(category.name, category.pk)
+        return categories, _lookup_names(Color, color_names), _lookup_names(Source, source_names)
+
+    def model_values(self, values, categories):
+        fields = {}
+        for name, value in values.items():
+            if name in ('slug', 'colors', 'sources'):
+                continue
+            if name == 'category':
+                if value not in categories:
+                    raise RowError(f'не найдена категория: {value}')
+                fields['category_id'] = categories[value]
+            else:
+                fields[name] = value
+        return fields
+
+    def row_links(self, values, colors, sources):
+        """[(связь, {id, ...})] для столбцов colors/sources, заданных в строке"""
+        row_links = []
+        for relation, lookup in (('colors', colors), ('sources', sources)):
+            if relation not in values:
+                continue
+            unknown = [name for name in values[relation] if name.casefold() not in lookup]
+            if unknown:
+                raise RowError(f'не найдены {relation}: ' + ', '.join(unknown))
+            row_links.append((relation, {lookup[name.casefold()] for name in values[relation]}))
+        return row_links
+
+    def save_links(self, links):
+        """
+        Приводит связи M2M к значениям из файла: на таблицу связей - один запрос
+        текущих связей, одно удаление и одна вставка только для изменившихся товаров.
+        Возвращает число товаров с измененными связями.
+        """
+        changed_products = set()
+        for relation in ('colors', 'sources'):
+            field = Product._meta.get_field(relation)
+            through = field.remote_field.through
+            column = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            selected = {product.pk: ids for product, name, ids in links if name == relation}
+            if not selected:
+                continue
+            current = defaultdict(set)
+            for product_id, pk in through.objects.filter(product_id__in=list(selected)).values_list('product_id', column):
+                current[product_id].add(pk)
+            changed = [product_id for product_id, ids in selected.items() if current[product_id] != ids]
+            if not changed:
+                continue
+            through.objects.filter(product_id__in=changed).delete()
+            through.objects.bulk_create(
+                [through(product_id=product_id, **{column: pk}) for product_id in changed for pk in selected[product_id]],
+                batch_size=self.batch_size,
+            )
+            changed_products.update(changed)
+        return len(changed_products)
+
+
+def _lookup_names(model, names):
+    """{название в нижнем регистре: pk} для названий из names (одним запросом)"""
+    if not names:
+        return {}
+    keys = {name.casefold() for name in names}
+    rows = model.objects.annotate(key=Lower('name')).filter(key__in=keys).values_list('key', 'pk')
+    lookup = {}
+    for key, pk in rows.order_by('pk'):
+        lookup.setdefault(key, pk)
+    return lookup
+
+
+# Экспорт
+
+def export_rows(queryset=None, chunk_size=2000):
+    """Строки экспорта; товары читаются курсором на сервере пачками по chunk_size"""
+    if queryset is None:
+        queryset = Product.objects.all()
+    queryset = (
+        queryset.order_by('pk').select_related('category').prefetch_related('colors', 'sources')
+        .defer('search_vector', 'image_variants', 'image_placeholder')
+    )
+    for product in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'slug': product.slug,
+            'name': product.name,
+            'short_description': product.short_description,
+            'description': product.description,
+            'category': product.category.slug,
+            'colors': [color.name for color in product.colors.all()],
+            'sources': [source.name for source in product.sources.all()],
+            'shape': product.shape,
+            'theme': product.theme,
+            'base_price': str(product.base_price),
+            'discount_price': str(product.discount_price) if product.discount_price is not None else None,
+            'min_quantity': product.min_quantity,
+            'max_quantity': product.max_quantity,
+            'is_customizable': product.is_customizable,
+            'custom_text_available': product.custom_text_available,
+            'is_active': product.is_active,
+            'is_featured': product.is_featured,
+            'image': product.image.name if product.image else '',
+        }
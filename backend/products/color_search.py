@@ -0,0 +1,168 @@
+"""
+Поиск товаров по ближайшему цвету.
+
+Активные цвета переводятся из hex_code в CIELAB (sRGB, белая точка D65) и
+держатся в памяти процесса отсортированными по светлоте L*. Разница цветов -
+CIE76 (евклидово расстояние в Lab), она не меньше разницы L*, поэтому
+кандидаты для допуска tolerance - срез по L* бинарным поиском. Вместе с
+цветами в памяти хранятся id активных товаров каждого цвета, так что список
+товаров по расстоянию строится без запросов к таблице товаров; из базы
+читается только текущая страница. Индекс перестраивается, когда меняется
+поколение цветов или товаров.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from core import generations
+from .models import Color, Product
+
+HEX_RE = re.compile(r'#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})')
+
+IndexedColor = namedtuple('IndexedColor', ['id', 'name', 'hex_code', 'lab'])
+ColorMatch = namedtuple('ColorMatch', ['color', 'distance'])
+
+
+def parse_hex(value):
+    """'#F0A' / 'ff00aa' -> (r, g, b) в 0..255; None, если это не цвет"""
+    match = HEX_RE.fullmatch(value.strip())
+    if match is None:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(digit * 2 for digit in digits)
+    return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def rgb_to_lab(rgb):
+    """sRGB (0..255) -> CIELAB (D65)"""
+    def linear(channel):
+        channel /= 255
+        return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+    r, g, b = (linear(channel) for channel in rgb)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def delta_e(lab1, lab2):
+    """Разница цветов CIE76"""
+    return math.dist(lab1, lab2)
+
+
+class ColorIndex:
+    models = (Color, Product)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = ([], [], {})
+        self.generations = None
+
+    def build(self):
+        """Построение из БД: цвета и связи с активными товарами (два запроса)"""
+        names = [generations.model_name(model) for model in self.models]
+        current = generations.current_many(names)
+
+        colors = []
+        for pk, name, hex_code in Color.objects.filter(is_active=True).values_list('pk', 'name', 'hex_code'):
+            rgb = parse_hex(hex_code)
+            if rgb is not None:
+                colors.append(IndexedColor(pk, name, hex_code, rgb_to_lab(rgb)))
+        colors.sort(key=lambda color: color.lab[0])
+
+        # Товары каждого цвета - в порядке по умолчанию при равном расстоянии
+        products = defaultdict(list)
+        links = (
+            Product.colors.through.objects.filter(product__is_active=True)
+            .order_by('-product__views_count', 'product_id')
+            .values_list('color_id', 'product_id')
+        )
+        for color_id, product_id in links:
+            products[color_id].append(product_id)
+
+        with self._lock:
+            self._snapshot = (colors, [color.lab[0] for color in colors], dict(products))
+            self.generations = current
+
+    def is_stale(self):
+        return self.generations is None or generations.current_many(list(self.generations)) != self.generations
+
+    def snapshot(self):
+        """Текущие данные индекса: build() в другом потоке заменяет их целиком"""
+        return self._snapshot
+
+    def nearest(self, snapshot, lab, tolerance):
+        """Цвета снимка не дальше tolerance от lab: [ColorMatch], по возрастанию расстояния"""
+        colors, lightness, _ = snapshot
+        start = bisect_left(lightness, lab[0] - tolerance)
+        stop = bisect_right(lightness, lab[0] + tolerance)
+        matches = [ColorMatch(color, delta_e(lab, color.lab)) for color in colors[start:stop]]
+        return sorted((match for match in matches if match.distance <= tolerance), key=lambda match: match.distance)
+
+    def products(self, snapshot, matches):
+        """[(id товара, ColorMatch)] товаров цветов matches по ближайшему из их цветов"""
+        _, _, products = snapshot
+        seen = set()
+        result = []
+        for match in matches:
+            for product_id in products.get(match.color.id, ()):
+                if product_id not in seen:
+                    seen.add(product_id)
+                    result.append((product_id, match))
+        return result
+
+
+index = ColorIndex()
+
+
+def _current_index():
+    if index.is_stale():
+        index.build()
+    return index
+
+
+class ColorSearchResult:
+    """Товары по расстоянию до цвета: пагинатор работает с ним как с queryset"""
+
+    def __init__(self, matches, products):
+        self.matches = matches
+        self.products = products
+
+    def count(self):
+        return len(self.products)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        page = self.products[item]
+        products = Product.objects.filter(pk__in=[pk for pk, _ in page]).select_related('category')
+        by_pk = {product.pk: product for product in products.prefetch_related('colors')}
+        result = []
+        for pk, match in page:
+            product = by_pk.get(pk)
+            if product is not None:
+                product.matched_color = match.color
+                product.color_distance = round(match.distance, 2)
+                result.append(product)
+        return result
+
+
+def search(rgb, tolerance):
+    """Товары с цветами не дальше tolerance (ΔE) от цвета rgb"""
+    current = _current_index()
+    # Цвета и их товары - из одного снимка, даже если индекс тем временем перестроен
+    snapshot = current.snapshot()
+    matches = current.nearest(snapshot, rgb_to_lab(rgb), tolerance)
+    return ColorSearchResult(matches, current.products(snapshot, matches))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import similar
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки похожих товаров по атрибутам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--changed', action='store_true',
+            help='Только списки, затронутые изменениями товаров с прошлой сборки',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = similar.build(changed_only=options['changed'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано списков: {updated} за {time.monotonic() - started:.1f} с'
+        ))
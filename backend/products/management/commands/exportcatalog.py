@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.formats import detect_format
+from products import catalog_io
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Экспортирует товары в CSV или JSON Lines (в формате importcatalog)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл экспорта или - для стандартного вывода')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='По умолчанию - по расширению файла')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--active', action='store_true', help='Только активные товары')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        queryset = Product.objects.all()
+        if options['active']:
+            queryset = queryset.filter(is_active=True)
+        rows = catalog_io.export_rows(queryset, chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            catalog_io.write_rows(sys.stdout, file_format, rows)
+            return
+        try:
+            with open(options['path'], 'w', encoding='utf-8', newline='') as file:
+                catalog_io.write_rows(file, file_format, rows)
+        except OSError as error:
+            raise CommandError(error)
+        self.stderr.write(self.style.SUCCESS(f"Экспорт сохранен в {options['path']}"))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.formats import detect_format
+from products import catalog_io
+
+
+class Command(BaseCommand):
+    help = 'Импортирует товары из CSV или JSON Lines (обновляет существующие по slug)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл импорта или - для стандартного ввода')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='По умолчанию - по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Проверить файл без записи в базу данных')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        importer = catalog_io.CatalogImporter(
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+            log=self.stderr.write,
+            progress=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        if options['path'] == '-':
+            result = importer.run(catalog_io.read_rows(sys.stdin, file_format))
+        else:
+            try:
+                with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                    result = importer.run(catalog_io.read_rows(file, file_format))
+            except OSError as error:
+                raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано: {result['created']}, обновлено: {result['updated']}, ошибок: {result['failed']} "
+            f"за {result['seconds']:.1f} с ({result['rate']:.0f} товаров/с)"
+        ))
+        if result['created'] + result['updated'] and not options['dry_run']:
+            self.stdout.write('Если в файле были новые изображения, запустите processimages')
+
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -8,6 +10,13 @@ class Category(models.Model):
     slug = models.SlugField(unique=True, verbose_name="URL")
     description = models.TextField(blank=True, verbose_name="Описание")
     image = models.ImageField(upload_to='categories/', blank=True, null=True, verbose_name="Изображение")
+    # Варианты и метаданные изображения, поддерживаются core.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина изображения")
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота изображения")
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Заглушка изображения")
     is_active = models.BooleanField(default=True, verbose_name="Активна")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
 
@@ -106,6 +115,13 @@ class Product(models.Model):
         verbose_name="Изображение товара",
         help_text="Загрузите основное изображение товара"
     )
+    # Варианты и метаданные изображения, поддерживаются core.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина изображения")
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота изображения")
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Заглушка изображения")
 
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name="Категория")
     colors = models.ManyToManyField(Color, verbose_name="Доступные цвета")
@@ -132,10 +148,22 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
 
+    # Поисковый вектор, поддерживается core.search при сохранении
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Keyset-пагинация списка товаров
+            models.Index(
+                fields=['-created_at', '-id'], name='product_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -1,11 +1,19 @@
+from django.conf import settings
 from rest_framework import serializers
+from core.serializers import SrcsetField
+from . import color_search
 from .models import Product, Category, Color, Source
 
 
 class CategorySerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'image']
+        fields = [
+            'id', 'name', 'slug', 'description', 'image', 'srcset',
+            'image_width', 'image_height', 'image_size', 'image_color', 'image_placeholder'
+        ]
 
 
 class ColorSerializer(serializers.ModelSerializer):
@@ -28,17 +36,40 @@ class ProductListSerializer(serializers.ModelSerializer):
     has_discount = serializers.ReadOnlyField()
     # ДОБАВЛЕНО: Поле image для отображения изображений
     image = serializers.ImageField(read_only=True)
+    srcset = SrcsetField()
 
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'slug', 'short_description', 'image',
+            'id', 'name', 'slug', 'short_description', 'image', 'srcset',
+            'image_width', 'image_height', 'image_size', 'image_color', 'image_placeholder',
             'category', 'colors', 'shape', 'theme',
             'base_price', 'discount_price', 'final_price', 'has_discount',
             'is_featured', 'views_count'
         ]
 
 
+class ProductColorMatchSerializer(ProductListSerializer):
+    """Товар в поиске по цвету: ближайший из его цветов и расстояние до искомого (ΔE)"""
+    matched_color = ColorSerializer(read_only=True)
+    color_distance = serializers.FloatField(read_only=True)
+
+    class Meta(ProductListSerializer.Meta):
+        fields = ProductListSerializer.Meta.fields + ['matched_color', 'color_distance']
+
+
+class ColorSearchQuerySerializer(serializers.Serializer):
+    """Искомый цвет (#RRGGBB или #RGB) и допуск ΔE (CIE76)"""
+    hex = serializers.CharField(max_length=7)
+    tolerance = serializers.FloatField(min_value=0, max_value=100, default=settings.COLOR_SEARCH_TOLERANCE)
+
+    def validate_hex(self, value):
+        rgb = color_search.parse_hex(value)
+        if rgb is None:
+            raise serializers.ValidationError('Ожидается цвет в формате #RRGGBB')
+        return rgb
+
+
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для детальной информации о товаре"""
     category = CategorySerializer(read_only=True)
@@ -48,11 +79,13 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     has_discount = serializers.ReadOnlyField()
     # ДОБАВЛЕНО: Поле image для детального просмотра
     image = serializers.ImageField(read_only=True)
+    srcset = SrcsetField()
 
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'slug', 'description', 'short_description', 'image',
+            'id', 'name', 'slug', 'description', 'short_description', 'image', 'srcset',
+            'image_width', 'image_height', 'image_size', 'image_color', 'image_placeholder',
             'category', 'colors', 'sources', 'shape', 'theme',
             'base_price', 'discount_price', 'final_price', 'has_discount',
             'min_quantity', 'max_quantity',
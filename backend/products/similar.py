@@ -0,0 +1,194 @@
+"""
+Похожие товары по атрибутам.
+
+Товар - двоичный вектор признаков: категория, форма, тематика, каждый цвет
+и каждый источник. Близость - взвешенный коэффициент Жаккара
+J(p, q) = w(p и q) / (w(p) + w(q) - w(p и q)) с весами SIMILAR_WEIGHTS.
+
+Строка p считается сразу для всех товаров на битовых масках, как в
+catalog_engine (маска признака - int, бит i - строка i): вес общих признаков
+w(p и q) для всех q складывается поразрядно в битовые плоскости двоичного
+счетчика. Товары с одинаковыми w(p и q) и w(q) получают одну оценку, поэтому
+лучшие k берутся из таких групп по убыванию оценки, а внутри группы первыми
+идут более просматриваемые товары.
+
+Списки хранятся в analytics.RelatedProduct, а признаки, по которым они
+посчитаны, - в analytics.ProductFeatures. Сборка с changed_only сравнивает
+признаки с сохраненными и пересчитывает только строки измененных товаров и
+тех, в чьи списки они входили или теперь могут войти.
+"""
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from analytics import related
+from analytics.models import ProductFeatures, RelatedProduct
+from core import generations
+from .catalog_engine import _bitset
+from .models import Product
+
+KIND = 'similar'
+# При большей доле измененных товаров проще пересчитать все строки
+FULL_REBUILD_SHARE = 0.1
+
+
+def _add(planes, mask, shift):
+    """Прибавляет mask * 2**shift к счетчику из битовых плоскостей planes"""
+    carry = mask
+    while carry:
+        if shift == len(planes):
+            planes.append(0)
+        planes[shift], carry = planes[shift] ^ carry, planes[shift] & carry
+        shift += 1
+
+
+def _rows(mask):
+    """Номера строк маски по возрастанию"""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield index * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+class FeatureMatrix:
+    def __init__(self, products, colors, sources):
+        weights = settings.SIMILAR_WEIGHTS
+        self.size = len(products)
+        self.ids = array('q', (product['pk'] for product in products))
+        self.position = {pk: row for row, pk in enumerate(self.ids)}
+
+        self.features = [
+            [(facet, product[facet]) for facet in ('category', 'shape', 'theme')] for product in products
+        ]
+        for facet, links in (('colors', colors), ('sources', sources)):
+            for product_id, value in links:
+                if product_id in self.position:
+                    self.features[self.position[product_id]].append((facet, value))
+
+        members = defaultdict(list)
+        by_weight = defaultdict(list)
+        self.weights = array('l')
+        for row, features in enumerate(self.features):
+            for feature in features:
+                members[feature].append(row)
+            weight = sum(weights[facet] for facet, _ in features)
+            self.weights.append(weight)
+            by_weight[weight].append(row)
+        self.masks = {feature: _bitset(rows, self.size) for feature, rows in members.items()}
+        self.weight_groups = {weight: _bitset(rows, self.size) for weight, rows in by_weight.items()}
+
+    @classmethod
+    def load(cls):
+        """Активные товары (сначала более просматриваемые) и две таблицы связей"""
+        products = list(
+            Product.objects.filter(is_active=True).order_by('-views_count', 'pk')
+            .values('pk', 'category', 'shape', 'theme')
+        )
+        colors = Product.colors.through.objects.values_list('product_id', 'color_id')
+        sources = Product.sources.through.objects.values_list('product_id', 'source_id')
+        return cls(products, list(colors), list(sources))
+
+    def signature(self, row):
+        """Признаки строки одной строкой (для сравнения с сохраненными)"""
+        return ' '.join(sorted(f'{facet}:{value}' for facet, value in self.features[row]))
+
+    def groups(self, row):
+        """(оценка, маска строк) для строк с общими признаками, по убыванию оценки"""
+        weights = settings.SIMILAR_WEIGHTS
+        planes = []
+        for facet, value in self.features[row]:
+            weight, shift = weights[facet], 0
+            while weight:
+                if weight & 1:
+                    _add(planes, self.masks[facet, value], shift)
+                weight >>= 1
+                shift += 1
+
+        # Маски строк с каждым значением веса общих признаков (без самой строки)
+        levels = {}
+        for overlap in range(1, 1 << len(planes)):
+            level = ~(1 << row)
+            for bit, plane in enumerate(planes):
+                level &= plane if overlap >> bit & 1 else ~plane
+            if level:
+                levels[overlap] = level
+
+        own = self.weights[row]
+        scores = sorted((
+            (overlap / (own + weight - overlap), overlap, weight)
+            for overlap in levels for weight in self.weight_groups
+            if weight >= overlap
+        ), reverse=True)
+        for score, overlap, weight in scores:
+            mask = levels[overlap] & self.weight_groups[weight]
+            if mask:
+                yield score, mask
+
+    def top(self, row, size):
+        """Лучшие size соседей строки: [(оценка, pk), ...]"""
+        result = []
+        for score, mask in self.groups(row):
+            for other in _rows(mask):
+                result.append((score, self.ids[other]))
+                if len(result) == size:
+                    return result
+        return result
+
+
+def _affected(matrix, changed):
+    """Товары, списки которых надо пересчитать после изменения товаров changed"""
+    affected = set(changed)
+    affected.update(
+        RelatedProduct.objects.filter(kind=KIND, related__in=changed).values_list('product_id', flat=True)
+    )
+    # Оценка последнего места в полном списке: кто ниже - в список не попадет
+    thresholds = dict(
+        RelatedProduct.objects.filter(kind=KIND, rank=settings.SIMILAR_SIZE).values_list('product_id', 'score')
+    )
+    for pk in changed:
+        row = matrix.position.get(pk)
+        if row is None:
+            continue
+        for score, mask in matrix.groups(row):
+            for other in _rows(mask):
+                if score >= thresholds.get(matrix.ids[other], 0):
+                    affected.add(matrix.ids[other])
+    return affected
+
+
+def build(changed_only=False):
+    """
+    Пересчитывает списки похожих товаров (changed_only - только затронутые
+    изменениями с прошлой сборки). Возвращает число пересчитанных списков.
+    """
+    matrix = FeatureMatrix.load()
+    signatures = {matrix.ids[row]: matrix.signature(row) for row in range(matrix.size)}
+    with transaction.atomic():
+        products = None
+        if changed_only:
+            stored = dict(ProductFeatures.objects.values_list('product_id', 'features'))
+            changed = {pk for pk in signatures.keys() | stored.keys() if signatures.get(pk) != stored.get(pk)}
+            if len(changed) <= FULL_REBUILD_SHARE * matrix.size:
+                products = _affected(matrix, changed)
+
+        rows = range(matrix.size) if products is None else [
+            matrix.position[pk] for pk in products if pk in matrix.position
+        ]
+        lists = {matrix.ids[row]: matrix.top(row, settings.SIMILAR_SIZE) for row in rows}
+        related.replace(KIND, lists, products)
+
+        features = ProductFeatures.objects.all()
+        if products is not None:
+            features = features.filter(product__in=changed)
+        features.delete()
+        ProductFeatures.objects.bulk_create([
+            ProductFeatures(product_id=pk, features=signatures[pk])
+            for pk in (signatures if products is None else changed & signatures.keys())
+        ], batch_size=5000)
+    if products is None or products:
+        generations.touch(RelatedProduct)
+    return len(lists)
@@ -11,14 +11,20 @@ urlpatterns = [
     path('', views.ProductListView.as_view(), name='product-list'),
     path('featured/', views.FeaturedProductsView.as_view(), name='featured-products'),
     path('popular/', views.PopularProductsView.as_view(), name='popular-products'),
+    path('trending/', views.TrendingProductsView.as_view(), name='trending-products'),
     path('create/', views.ProductCreateView.as_view(), name='product-create'),
+
+    # Утилиты (до маршрута по slug, иначе он их перехватывает)
+    path('filters/', views.product_filters, name='product-filters'),
+    path('search/', views.search_products, name='product-search'),
+    path('autocomplete/', views.autocomplete_products, name='product-autocomplete'),
+    path('by-color/', views.ProductsByColorView.as_view(), name='products-by-color'),
+
     path('<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('<slug:slug>/bought-together/', views.BoughtTogetherView.as_view(), name='product-bought-together'),
+    path('<slug:slug>/similar/', views.SimilarProductsView.as_view(), name='product-similar'),
     
     # Отзывы
     # path('<int:product_id>/reviews/', views.ReviewListCreateView.as_view(), name='product-reviews'),
-    
-    # Утилиты
-    path('filters/', views.product_filters, name='product-filters'),
-    path('search/', views.search_products, name='product-search'),
 ]
 
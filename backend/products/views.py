@@ -2,38 +2,56 @@ from rest_framework import generics, filters, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Min, Max
+from django.conf import settings
+from django.db.models import Min, Max
+from django.shortcuts import get_object_or_404
+from core.conditional import ConditionalMixin, conditional
+from core.pagination import KeysetPagination
+from core.response_cache import CachedResponseMixin, cache_response
+from core.search import FullTextSearchFilter, search
+from core.view_counters import record_view, views_generation
+from analytics import bought_together, trending
+from analytics.models import RelatedProduct, TrendingScore
+from . import autocomplete, catalog_engine, color_search, similar
 from .models import Category, Color, Source, Product
 from .serializers import (
     CategorySerializer, ColorSerializer, SourceSerializer,
     ProductListSerializer, ProductDetailSerializer, 
-    ProductCreateSerializer
+    ProductCreateSerializer, ProductColorMatchSerializer, ColorSearchQuerySerializer
 )
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Список категорий"""
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
+    cache_models = (Category,)
+    version_models = (Category,)
 
 
-class ColorListView(generics.ListAPIView):
+class ColorListView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Список цветов"""
     queryset = Color.objects.filter(is_active=True)
     serializer_class = ColorSerializer
+    cache_models = (Color,)
+    version_models = (Color,)
 
 
-class SourceListView(generics.ListAPIView):
+class SourceListView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Список источников материалов"""
     queryset = Source.objects.filter(is_active=True)
     serializer_class = SourceSerializer
+    cache_models = (Source,)
+    version_models = (Source,)
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(ConditionalMixin, generics.ListAPIView):
     """Список товаров с фильтрацией"""
     queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    version_models = (Product, Category, Color, Source, views_generation(Product))
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'colors', 'sources', 'shape', 'theme', 'is_featured']
     search_fields = ['name', 'description', 'short_description']
     ordering_fields = ['created_at', 'base_price', 'views_count', 'name']
@@ -53,33 +71,123 @@ class ProductListView(generics.ListAPIView):
             
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Фильтры, сортировку и количество по возможности считает движок в памяти
+        if settings.CATALOG_ENGINE_ENABLED and 'cursor' not in request.query_params:
+            result = catalog_engine.engine.query(request.query_params)
+            if result is not None:
+                page = self.paginate_queryset(result)
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
-class ProductDetailView(generics.RetrieveAPIView):
+
+class ProductDetailView(ConditionalMixin, generics.RetrieveAPIView):
     """Детальная информация о товаре"""
     queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductDetailSerializer
+    version_models = (Product, Category, Color, Source, views_generation(Product))
     lookup_field = 'slug'
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Увеличиваем счетчик просмотров
-        instance.views_count += 1
-        instance.save(update_fields=['views_count'])
-        
+        # Просмотр попадет в БД при следующем сбросе буфера. В ответе - сохраненный
+        # views_count: ETag меняется только при сбросе, и тело должно меняться вместе с ним
+        record_view(instance)
+
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def not_modified(self, request, *args, **kwargs):
+        # Просмотр учитывается и тогда, когда клиенту хватает его копии
+        record_view(self.get_object())
+
 
-class FeaturedProductsView(generics.ListAPIView):
+class FeaturedProductsView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Рекомендуемые товары"""
     queryset = Product.objects.filter(is_active=True, is_featured=True).select_related('category')
     serializer_class = ProductListSerializer
+    cache_models = (Product, Category, Color, views_generation(Product))
+    version_models = (Product, Category, Color, views_generation(Product))
 
 
-class PopularProductsView(generics.ListAPIView):
+class PopularProductsView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
     """Популярные товары (по просмотрам)"""
     queryset = Product.objects.filter(is_active=True).select_related('category').order_by('-views_count')[:10]
     serializer_class = ProductListSerializer
+    cache_models = (Product, Category, Color, views_generation(Product))
+    version_models = (Product, Category, Color, views_generation(Product))
+
+
+class TrendingProductsView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
+    """Товары в тренде (просмотры и заказы с затуханием по времени)"""
+    serializer_class = ProductListSerializer
+    cache_models = (Product, Category, Color, TrendingScore, views_generation(Product))
+    version_models = (Product, Category, Color, TrendingScore, views_generation(Product))
+
+    def get_queryset(self):
+        return trending.top_objects(
+            Product.objects.filter(is_active=True).select_related('category').prefetch_related('colors')
+        )
+
+
+class ProductsByColorView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
+    """Товары с цветами, близкими к заданному (по возрастанию разницы цветов)"""
+    serializer_class = ProductColorMatchSerializer
+    cache_models = (Product, Category, Color, views_generation(Product))
+    version_models = (Product, Category, Color, views_generation(Product))
+
+    def get_queryset(self):
+        serializer = ColorSearchQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        self.result = color_search.search(serializer.validated_data['hex'], serializer.validated_data['tolerance'])
+        return self.result
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['colors'] = [
+            {'id': match.color.id, 'name': match.color.name, 'hex_code': match.color.hex_code,
+             'distance': round(match.distance, 2)}
+            for match in self.result.matches
+        ]
+        return response
+
+
+class RelatedProductsView(ConditionalMixin, CachedResponseMixin, generics.ListAPIView):
+    """Готовый список рекомендуемых товаров вида kind для товара (analytics.RelatedProduct)"""
+    serializer_class = ProductListSerializer
+    pagination_class = None
+    cache_models = (Product, Category, Color, RelatedProduct, views_generation(Product))
+    version_models = (Product, Category, Color, RelatedProduct, views_generation(Product))
+    kind = None
+
+    def get_queryset(self):
+        return (
+            Product.objects.filter(
+                is_active=True,
+                recommended_for__product__slug=self.kwargs['slug'],
+                recommended_for__product__is_active=True,
+                recommended_for__kind=self.kind,
+            )
+            .select_related('category').prefetch_related('colors')
+            .order_by('recommended_for__rank')
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not response.data:
+            get_object_or_404(Product, slug=self.kwargs['slug'], is_active=True)
+        return response
+
+
+class BoughtTogetherView(RelatedProductsView):
+    """Товары, которые покупают вместе с данным"""
+    kind = bought_together.KIND
+
+
+class SimilarProductsView(RelatedProductsView):
+    """Похожие товары (по категории, форме, тематике, цветам и источникам)"""
+    kind = similar.KIND
 
 
 class ProductCreateView(generics.CreateAPIView):
@@ -102,49 +210,79 @@ class ProductCreateView(generics.CreateAPIView):
 #         return ReviewSerializer
 
 
-@api_view(['GET'])
-def product_filters(request):
-    """Получение всех доступных фильтров"""
-    categories = Category.objects.filter(is_active=True)
-    colors = Color.objects.filter(is_active=True)
-    sources = Source.objects.filter(is_active=True)
-    
-    # Получаем диапазон цен
-    products = Product.objects.filter(is_active=True)
-    price_range = products.aggregate(min_price=Min('base_price'), max_price=Max('base_price'))
-    min_price = price_range['min_price'] or 0
-    max_price = price_range['max_price'] or 0
-    
+def filter_counts(params):
+    """Количество товаров для значений фильтров при текущих параметрах (или None)"""
+    if settings.CATALOG_ENGINE_ENABLED:
+        return catalog_engine.engine.facet_counts(params)
+    return None
+
+
+def filter_options(categories, colors, sources, price_range, counts):
+    """Ответ endpoint-а фильтров (общий для синхронной и асинхронной версий)"""
     shapes = [{'value': choice[0], 'label': choice[1]} for choice in Product.SHAPE_CHOICES]
     themes = [{'value': choice[0], 'label': choice[1]} for choice in Product.THEME_CHOICES]
     
-    return Response({
+    data = {
         'categories': CategorySerializer(categories, many=True).data,
         'colors': ColorSerializer(colors, many=True).data,
         'sources': SourceSerializer(sources, many=True).data,
         'shapes': shapes,
         'themes': themes,
         'price_range': {
-            'min': min_price,
-            'max': max_price
+            'min': price_range['min_price'] or 0,
+            'max': price_range['max_price'] or 0
         }
-    })
+    }
+
+    # Количество товаров для каждого значения при текущих фильтрах (те же параметры, что у списка)
+    if counts is not None:
+        for key, facet, field in (
+            ('categories', 'category', 'id'), ('colors', 'colors', 'id'),
+            ('sources', 'sources', 'id'), ('shapes', 'shape', 'value'), ('themes', 'theme', 'value'),
+        ):
+            for item in data[key]:
+                item['count'] = counts[facet].get(item[field], 0)
+    return data
 
 
 @api_view(['GET'])
+@conditional(Product, Category, Color, Source)
+@cache_response(Product, Category, Color, Source)
+def product_filters(request):
+    """Получение всех доступных фильтров"""
+    categories = Category.objects.filter(is_active=True)
+    colors = Color.objects.filter(is_active=True)
+    sources = Source.objects.filter(is_active=True)
+    
+    # Получаем диапазон цен
+    products = Product.objects.filter(is_active=True)
+    price_range = products.aggregate(min_price=Min('base_price'), max_price=Max('base_price'))
+
+    return Response(filter_options(categories, colors, sources, price_range, filter_counts(request.query_params)))
+
+
+@api_view(['GET'])
+@conditional(Product, Category, Color, views_generation(Product))
 def search_products(request):
     """Поиск товаров"""
     query = request.GET.get('q', '')
     if not query:
         return Response({'results': []})
     
-    products = Product.objects.filter(
-        Q(name__icontains=query) | 
-        Q(description__icontains=query) |
-        Q(short_description__icontains=query),
-        is_active=True
-    ).select_related('category')[:20]
+    products = search(
+        Product.objects.filter(is_active=True).select_related('category'), query
+    )[:20]
     
     serializer = ProductListSerializer(products, many=True)
     return Response({'results': serializer.data})
 
+
+@api_view(['GET'])
+def autocomplete_products(request):
+    """Подсказки для строки поиска (из индекса в памяти, без запросов к БД)"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(int(request.GET.get('limit', 8)), 20)
+    except ValueError:
+        limit = 8
+    return Response({'results': autocomplete.suggest(query, limit)})